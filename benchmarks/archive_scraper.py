@@ -0,0 +1,129 @@
+import argparse
+import datetime
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+from pulsespotter.ingestion.scrapers.site_archive_scraper import NewsArchiveScraper
+from pulsespotter.ingestion.utils.data_models import NewsArchiveScraperParams
+from pulsespotter.ingestion.utils.parse_functions import parse_date
+from pulsespotter.utils.logging_utils import get_logger
+
+BASE_URL = "https://stub.local"
+
+
+class StubZenrowsHandler(BaseHTTPRequestHandler):
+    """
+    Stands in for the ZenRows endpoint: archive pages list `articles_per_page` articles of their date,
+    article pages contain a title, a date and a paragraph. Every response is delayed by `latency` seconds.
+    """
+    articles_per_page = 20
+    latency = 0.05
+
+    def do_GET(self):
+        target_url = parse_qs(urlparse(self.path).query)["url"][0]
+        path = urlparse(target_url).path
+        time.sleep(self.latency)
+        if path.startswith("/archiv/"):
+            date = path.rsplit("/", 1)[-1]
+            links = "".join(
+                f"<a class='teaser' href='/artikel/{date}/{i}'>Artikel {i}</a>" for i in range(self.articles_per_page)
+            )
+            body = f"<html><body><main>{links}</main></body></html>"
+        else:
+            _, _, date, idx = path.split("/")
+            body = (
+                f"<html><body><article><h1>Artikel {idx}</h1><time>{date}</time>"
+                f"<p>Inhalt des Artikels {idx} vom {date}.</p></article></body></html>"
+            )
+        payload = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class InMemoryArticlesRepository:
+    write_latency = 0.0
+
+    def __init__(self):
+        self.articles = {}
+
+    def count(self, q: dict):
+        return sum(article["site_name"] == q["site_name"] for article in self.articles.values())
+
+    def iter_site_urls(self, site_name: str, after_id: str = None):
+        return iter([])
+
+    def filter_unseen_urls(self, urls: list):
+        return [url for url in dict.fromkeys(urls) if url not in self.articles]
+
+    def add_articles(self, articles: list):
+        time.sleep(self.write_latency)
+        new_articles = [article for article in articles if article["url"] not in self.articles]
+        self.articles.update((article["url"], article) for article in new_articles)
+        return len(new_articles)
+
+
+def build_scraper(max_concurrent_requests: int) -> NewsArchiveScraper:
+    params = NewsArchiveScraperParams(
+        site_name="stub",
+        base_url=BASE_URL,
+        search_url_templates=[f"{BASE_URL}/archiv/{{year}}-{{month}}-{{day}}"],
+        crawler_request_params={},
+        site_elements_patterns={"articles_pattern": "//a[@class='teaser']/@href"},
+        scraper_request_params={},
+        scrape_patterns={
+            "title": {"pattern": "//article/h1/text()"},
+            "raw_date": {"pattern": "//article/time/text()"},
+            "parsed_date": {"pattern": "//article/time/text()", "parse_func": parse_date},
+            "paragraphs": {"pattern": "//article/p/text()", "extract_all": True},
+        },
+        max_concurrent_requests=max_concurrent_requests,
+        resume_crawls=False,
+    )
+    scraper = NewsArchiveScraper(params)
+    scraper._articles_repository = InMemoryArticlesRepository()
+    return scraper
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Benchmarks the archive scraper against a local ZenRows stub.")
+    parser.add_argument("--num-days", type=int, default=3, help="Number of archive days to crawl.")
+    parser.add_argument("--articles-per-page", type=int, default=20, help="Articles listed per archive page.")
+    parser.add_argument("--latency", type=float, default=0.05, help="Latency of every stub response in seconds.")
+    parser.add_argument("--concurrency", type=int, default=8, help="Maximum in-flight requests per site.")
+    parser.add_argument("--write-latency", type=float, default=0.0, help="Latency of every database write.")
+    args = parser.parse_args()
+
+    logger = get_logger(__name__)
+    StubZenrowsHandler.articles_per_page = args.articles_per_page
+    StubZenrowsHandler.latency = args.latency
+    InMemoryArticlesRepository.write_latency = args.write_latency
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubZenrowsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    NewsArchiveScraper.zenrows_api_url = f"http://127.0.0.1:{server.server_port}/v1/"
+    NewsArchiveScraper.logger.disabled = True
+
+    end_date = datetime.datetime(2024, 6, 19)
+    start_date = end_date - datetime.timedelta(days=args.num_days - 1)
+    modes = {
+        "sequential": lambda scraper: scraper.run_between(start_date, end_date, page_limit=1),
+        f"concurrent ({args.concurrency} in flight)": lambda scraper: scraper.run_between_concurrently(
+            start_date, end_date, page_limit=1,
+        ),
+    }
+    for name, run in modes.items():
+        scraper = build_scraper(args.concurrency)
+        start = time.perf_counter()
+        run(scraper)
+        elapsed = time.perf_counter() - start
+        num_articles = len(scraper._articles_repository.articles)
+        logger.info(f"{name}: {num_articles} articles in {elapsed:.2f}s ({num_articles / elapsed:.1f} articles/sec)")
+    server.shutdown()
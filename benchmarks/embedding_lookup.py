@@ -0,0 +1,67 @@
+import argparse
+import random
+import time
+import uuid
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.http.models import Distance, PointStruct
+from qdrant_client.http.models import Filter, FieldCondition, MatchValue
+
+from pulsespotter.db.repositories.article_embeddings import ArticleEmbeddingsRepository
+from pulsespotter.utils.logging_utils import get_logger
+
+
+def populate_collection(repository: ArticleEmbeddingsRepository, num_points: int, vector_size: int):
+    article_ids = [uuid.uuid4().hex[:24] for _ in range(num_points)]
+    vectors = np.random.rand(num_points, vector_size).astype(np.float32)
+    for i in range(0, num_points, 1000):
+        repository._client.upsert(
+            collection_name=repository.collection_name,
+            points=[
+                PointStruct(id=str(uuid.uuid4()), vector=vector.tolist(), payload={"article_id": article_id})
+                for article_id, vector in zip(article_ids[i:i + 1000], vectors[i:i + 1000])
+            ],
+        )
+    return article_ids
+
+
+def zero_vector_lookup(repository: ArticleEmbeddingsRepository, article_id: str):
+    # the lookup as it was done before, through a scored search with a payload filter
+    filter_ = Filter(must=[FieldCondition(key="article_id", match=MatchValue(value=article_id))])
+    return repository._client.query_points(
+        collection_name=repository.collection_name,
+        query=[0] * repository.vector_size,
+        limit=1,
+        query_filter=filter_,
+        with_vectors=True,
+    ).points
+
+
+def measure(func, article_ids: list):
+    start = time.perf_counter()
+    for article_id in article_ids:
+        func(article_id)
+    return (time.perf_counter() - start) / len(article_ids) * 1000
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Benchmarks single embedding lookups against an in-process Qdrant.")
+    parser.add_argument("--num-points", type=int, default=20000, help="Number of points in the collection.")
+    parser.add_argument("--vector-size", type=int, default=384, help="Size of the stored vectors.")
+    parser.add_argument("--num-lookups", type=int, default=200, help="Number of lookups per method.")
+    args = parser.parse_args()
+
+    logger = get_logger(__name__)
+    repository = ArticleEmbeddingsRepository(client=QdrantClient(":memory:"))
+    repository.recreate_collection(vector_size=args.vector_size, distance=Distance.COSINE)
+    logger.info(f"Populating collection with {args.num_points} points ...")
+    all_article_ids = populate_collection(repository, args.num_points, args.vector_size)
+    lookup_ids = random.sample(all_article_ids, min(args.num_lookups, len(all_article_ids)))
+
+    zero_vector_ms = measure(lambda article_id: zero_vector_lookup(repository, article_id), lookup_ids)
+    scroll_ms = measure(repository.get_article_embedding, lookup_ids)
+    logger.info(f"zero-vector search: {zero_vector_ms:.3f} ms/lookup")
+    logger.info(f"filtered scroll:    {scroll_ms:.3f} ms/lookup")
+    logger.info(f"speedup:            {zero_vector_ms / scroll_ms:.1f}x")
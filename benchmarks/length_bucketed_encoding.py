@@ -0,0 +1,66 @@
+import argparse
+import random
+import time
+
+from more_itertools import chunked
+from sentence_transformers import SentenceTransformer
+
+from pulsespotter.ingestion.utils.encoding import LengthBucketedEncoder
+from pulsespotter.utils.logging_utils import get_logger
+
+VOCABULARY = [
+    "stadt", "duisburg", "polizei", "rat", "schule", "verkehr", "bahnhof", "feuerwehr", "bürger", "projekt",
+    "hafen", "sport", "verein", "wetter", "kultur", "politik", "wirtschaft", "unternehmen", "straße", "jahr",
+]
+
+
+def build_corpus(num_documents: int, seed: int = 42):
+    # mix of short teasers and long articles, similar to the spread of the scraped sites
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(num_documents):
+        num_words = int(min(rng.lognormvariate(4.0, 1.0), 600)) + 5
+        corpus.append(" ".join(rng.choices(VOCABULARY, k=num_words)))
+    return corpus
+
+
+def measure(func, num_documents: int):
+    start = time.perf_counter()
+    func()
+    return num_documents / (time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Benchmarks fixed vs. length-bucketed batching of the encoder.")
+    parser.add_argument(
+        "--model-name", type=str, default="sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2",
+        help="Name of the SentenceTransformer model."
+    )
+    parser.add_argument("--num-documents", type=int, default=2048, help="Size of the synthetic corpus.")
+    parser.add_argument("--batch-size", type=int, default=16, help="Batch size of the fixed batching.")
+    parser.add_argument("--window-size", type=int, default=256, help="Documents handed to the bucketed encoder.")
+    parser.add_argument("--max-batch-tokens", type=int, default=8192, help="Token budget per bucketed batch.")
+    args = parser.parse_args()
+
+    logger = get_logger(__name__)
+    model = SentenceTransformer(args.model_name, device="cpu")
+    model.eval()
+    encoder = LengthBucketedEncoder(model, max_tokens=args.max_batch_tokens)
+    corpus = build_corpus(args.num_documents)
+    # warm up
+    model.encode(corpus[:args.batch_size])
+
+    def fixed_batching():
+        for batch in chunked(corpus, args.batch_size):
+            model.encode(batch, batch_size=args.batch_size)
+
+    def bucketed_batching():
+        for window in chunked(corpus, args.window_size):
+            encoder.encode(window)
+
+    logger.info(f"fixed batches of {args.batch_size}: {measure(fixed_batching, len(corpus)):.1f} articles/sec")
+    logger.info(
+        f"token-budget batches of {args.max_batch_tokens} tokens over windows of {args.window_size}: "
+        f"{measure(bucketed_batching, len(corpus)):.1f} articles/sec"
+    )
@@ -0,0 +1,101 @@
+import argparse
+import time
+from pathlib import Path
+from urllib.parse import urljoin
+
+from scrapy import Selector
+
+from pulsespotter.ingestion.scrapers.site_scraper import NewsSiteScraper
+from pulsespotter.ingestion.utils.data_models import NewsScraperParams
+from pulsespotter.utils.logging_utils import get_logger
+
+FIXTURES_DIR = Path(__file__).parent.joinpath("fixtures")
+
+
+def build_scraper() -> NewsSiteScraper:
+    params = NewsScraperParams(
+        site_name="fixture",
+        base_url="https://fixture.local",
+        crawler_request_params={},
+        site_elements_patterns={
+            "topics_urls_pattern": "//ul[@class='nav']//a/@href",
+            "must_exist_pattern": "//section[@class='archive-list']",
+            "articles_pattern": "//article[contains(@class, 'teaser')]/a/@href",
+            "active_page_pattern": "//li[contains(@class, 'pagination__item--active')]/a",
+            "next_page_pattern": "//a[@class='pagination__next']/@href",
+        },
+        scraper_request_params={},
+        scrape_patterns={},
+        use_url_filter=False,
+    )
+    return NewsSiteScraper(params)
+
+
+def process_page_per_method(scraper: NewsSiteScraper, page_source: str):
+    # every check parses the page on its own, as the scraper did before sharing the selector
+    scraper._should_crawl_page(Selector(text=page_source))
+    scraper._check_page_limit_reached(Selector(text=page_source), 15)
+    scraper._find_article_urls(Selector(text=page_source))
+    scraper._get_next_page(Selector(text=page_source))
+
+
+def check_page_uncompiled(scraper: NewsSiteScraper, selector: Selector):
+    # evaluates the raw xpath strings through scrapy, as the scraper did before compiling them at construction,
+    # with the same post-processing as the scraper methods
+    patterns = scraper._site_elements_patterns
+    selector.xpath(patterns.must_exist_pattern).get()
+    if selector.xpath(patterns.active_page_pattern).get() is not None:
+        int(selector.xpath(f"{patterns.active_page_pattern}/text()").get().strip())
+    [urljoin(scraper._base_url, url) for url in selector.xpath(patterns.articles_pattern).getall()]
+    next_page_url = selector.xpath(patterns.next_page_pattern).get()
+    if next_page_url is not None:
+        urljoin(scraper._base_url, next_page_url.lstrip(" ").lstrip("@"))
+
+
+def check_page(scraper: NewsSiteScraper, selector: Selector):
+    scraper._should_crawl_page(selector)
+    scraper._check_page_limit_reached(selector, 15)
+    scraper._find_article_urls(selector)
+    scraper._get_next_page(selector)
+
+
+def process_page_once_uncompiled(scraper: NewsSiteScraper, page_source: str):
+    check_page_uncompiled(scraper, Selector(text=page_source))
+
+
+def process_page_once(scraper: NewsSiteScraper, page_source: str):
+    check_page(scraper, Selector(text=page_source))
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Benchmarks the processing of saved listing pages.")
+    parser.add_argument("--repeats", type=int, default=200, help="Number of times every fixture is processed.")
+    args = parser.parse_args()
+
+    logger = get_logger(__name__)
+    page_sources = [path.read_text(encoding="utf-8") for path in sorted(FIXTURES_DIR.glob("*.html"))]
+    scraper = build_scraper()
+    modes = {
+        "parse per method": process_page_per_method,
+        "parse once, scrapy xpaths": process_page_once_uncompiled,
+        "parse once, compiled xpaths": process_page_once,
+    }
+    for name, process_page in modes.items():
+        start = time.perf_counter()
+        for _ in range(args.repeats):
+            for page_source in page_sources:
+                process_page(scraper, page_source)
+        elapsed = time.perf_counter() - start
+        num_pages = args.repeats * len(page_sources)
+        logger.info(f"{name}: {1000 * elapsed / num_pages:.2f} ms/page ({num_pages / elapsed:.1f} pages/sec)")
+
+    # the same checks on already parsed pages, without the html parsing which dominates the timings above
+    selectors = [Selector(text=page_source) for page_source in page_sources]
+    for name, check in {"scrapy xpaths only": check_page_uncompiled, "compiled xpaths only": check_page}.items():
+        start = time.perf_counter()
+        for _ in range(args.repeats):
+            for selector in selectors:
+                check(scraper, selector)
+        elapsed = time.perf_counter() - start
+        logger.info(f"{name}: {1e6 * elapsed / (args.repeats * len(selectors)):.0f} us/page")
@@ -0,0 +1,50 @@
+import argparse
+import json
+import time
+
+import dateparser
+
+from config import TESTS_DIR
+from pulsespotter.ingestion.utils.parse_functions import (
+    parse_date, _parse_date_candidate, DATE_PATTERN, ISO_DATE_PATTERN,
+)
+from pulsespotter.utils.logging_utils import get_logger
+
+
+def parse_date_with_dateparser(value: str):
+    # the previous implementation: every candidate goes through dateparser
+    for date_str in DATE_PATTERN.findall(value):
+        order = "YMD" if ISO_DATE_PATTERN.match(date_str) else "DMY"
+        date = dateparser.parse(date_str, settings={"PREFER_DAY_OF_MONTH": "first", "DATE_ORDER": order})
+        if date:
+            return date.strftime("%Y-%m-%d")
+
+
+def parse_date_uncached(value: str):
+    parse_date.cache_clear()
+    _parse_date_candidate.cache_clear()
+    return parse_date(value)
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Benchmarks parse_date over the date test cases.")
+    parser.add_argument("--repeats", type=int, default=20, help="Number of times every test case is parsed.")
+    args = parser.parse_args()
+
+    logger = get_logger(__name__)
+    test_cases = json.load(open(TESTS_DIR.joinpath("test_cases/dates.json")))
+    values = [test_case["value"] for test_case in test_cases]
+    modes = {
+        "dateparser only": parse_date_with_dateparser,
+        "tiered, cold cache": parse_date_uncached,
+        "tiered, warm cache": parse_date,
+    }
+    for name, func in modes.items():
+        start = time.perf_counter()
+        for _ in range(args.repeats):
+            for value in values:
+                func(value)
+        elapsed = time.perf_counter() - start
+        num_calls = args.repeats * len(values)
+        logger.info(f"{name}: {1e6 * elapsed / num_calls:.1f} us/call ({num_calls / elapsed:.0f} calls/sec)")
@@ -0,0 +1,56 @@
+import argparse
+import time
+import uuid
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.http.models import Distance
+
+from pulsespotter.db.repositories.article_embeddings import ArticleEmbeddingsRepository
+from pulsespotter.utils.logging_utils import get_logger
+
+
+def measure(func, num_vectors: int):
+    start = time.perf_counter()
+    func()
+    return num_vectors / (time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Benchmarks embedding upserts against an in-process Qdrant.")
+    parser.add_argument("--num-vectors", type=int, default=5000, help="Number of vectors to upsert per method.")
+    parser.add_argument("--vector-size", type=int, default=384, help="Size of the upserted vectors.")
+    parser.add_argument("--batch-size", type=int, default=256, help="Number of vectors per upsert request.")
+    parser.add_argument("--parallel", type=int, default=4, help="Number of parallel chunk uploads.")
+    parser.add_argument(
+        "--qdrant-url", type=str, default=None,
+        help="Optional URL of a Qdrant server to benchmark against instead of the in-process instance."
+    )
+    args = parser.parse_args()
+
+    logger = get_logger(__name__)
+    client = QdrantClient(url=args.qdrant_url) if args.qdrant_url else QdrantClient(":memory:")
+    repository = ArticleEmbeddingsRepository(client=client)
+    article_ids = [uuid.uuid4().hex[:24] for _ in range(args.num_vectors)]
+    embeddings = np.random.rand(args.num_vectors, args.vector_size).astype(np.float32).tolist()
+
+    def add_one_by_one():
+        for article_id, embedding in zip(article_ids, embeddings):
+            repository.add_embedding(article_id, embedding)
+
+    methods = {
+        "one upsert per vector": add_one_by_one,
+        f"chunks of {args.batch_size}": lambda: repository.batch_add_embeddings(
+            article_ids, embeddings, batch_size=args.batch_size,
+        ),
+        f"chunks of {args.batch_size}, wait=False": lambda: repository.batch_add_embeddings(
+            article_ids, embeddings, batch_size=args.batch_size, wait=False,
+        ),
+        f"chunks of {args.batch_size}, wait=False, parallel={args.parallel}": lambda: repository.batch_add_embeddings(
+            article_ids, embeddings, batch_size=args.batch_size, wait=False, parallel=args.parallel,
+        ),
+    }
+    for name, method in methods.items():
+        repository.recreate_collection(vector_size=args.vector_size, distance=Distance.COSINE)
+        logger.info(f"{name}: {measure(method, args.num_vectors):.0f} vectors/sec")
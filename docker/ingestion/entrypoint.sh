@@ -24,23 +24,19 @@ if [[ -z "$start_date" || -z "$end_date" || -z "$page_limit" ]]; then
 fi
 
 # List of site names
-#site_names=("handelsblatt" "tagesschau" "heise" "tagesspiegel" "spiegel")
-site_names=("presseportal" "rheinischepost" "duisburg-de" "lokalklick" "lokalkompass")
+#site_names="handelsblatt,tagesschau,heise,tagesspiegel,spiegel"
+site_names="presseportal,rheinischepost,duisburg-de,lokalklick,lokalkompass"
 
 # Create logs directory with today's date
 today=$(date +%Y-%m-%d)
 log_dir="logs/$today"
 mkdir -p $log_dir
 
-# Iterate through site names and launch separate processes
-for site_name in "${site_names[@]}"; do
-    log_file="$log_dir/$site_name.txt"
-    nohup python -m pulsespotter.ingestion.scripts.content_ingestion \
-        --start-date "$start_date" \
-        --end-date "$end_date" \
-        --page-limit "$page_limit" \
-        --site-name "$site_name" > "$log_file" 2>&1 &
-    echo "Started process for site_name: $site_name, logs at: $log_file"
-done
-
-wait
+# Crawl all sites in parallel within a single process
+log_file="$log_dir/content_ingestion.txt"
+echo "Started process for sites: $site_names, logs at: $log_file"
+python -m pulsespotter.ingestion.scripts.content_ingestion \
+    --start-date "$start_date" \
+    --end-date "$end_date" \
+    --page-limit "$page_limit" \
+    --sites "$site_names" > "$log_file" 2>&1
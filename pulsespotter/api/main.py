@@ -44,6 +44,7 @@ async def get_article_info(
             "topic_id": article_assignment_data.get("topic_id"),
             "topic_label": article_assignment_data.get("topic_label"),
             "topic_assignment_probability": article_assignment_data.get("assignment_probability"),
+            "topic_assignment_similarity": article_assignment_data.get("assignment_similarity"),
         }
     return response
 
@@ -101,10 +102,13 @@ async def get_similar_articles(
         embeddings_repository: ArticleEmbeddingsRepository = Depends(get_article_embeddings_repository),
 ):
     search_response = embeddings_repository.search_similar(article_id=article_id, limit=10, min_similarity=0.5)
+    target_articles = articles_repository.get_articles_by_ids(
+        [record["article_id"] for record in search_response],
+        projection=["title", "description", "paragraphs", "parsed_date", "url", "site_name", "_id"],
+    )
+    scores = {record["article_id"]: record["score"] for record in search_response}
     response = []
-    for record in search_response:
-        target_article = articles_repository.get_article_by_id(record["article_id"])
-        target_article["similarity"] = record["score"]
+    for target_article in target_articles:
         response.append({
             "title": target_article.get("title") or "",
             "description": target_article.get("description") or "",
@@ -113,7 +117,7 @@ async def get_similar_articles(
             "article_id": target_article["_id"],
             "site_name": target_article.get("site_name") or "",
             "url": target_article.get("url") or "",
-            "score": record["score"],
+            "score": scores[target_article["_id"]],
         })
     return response
 
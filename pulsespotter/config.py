@@ -12,6 +12,7 @@ MONGO_HOST = os.getenv("MONGO_HOST")
 MONGO_DATABASE = os.getenv("MONGO_DATABASE")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 ZENROWS_API_KEY = os.getenv("ZENROWS_API_KEY")
+ZENROWS_API_URL = os.getenv("ZENROWS_API_URL", "https://api.zenrows.com/v1/")
 QDRANT_HOST = os.getenv("QDRANT_HOST")
 QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
 API_BASE_URL = os.getenv("API_BASE_URL")
@@ -24,6 +25,7 @@ __all__ = [
     "MONGO_DATABASE",
     "OPENAI_API_KEY",
     "ZENROWS_API_KEY",
+    "ZENROWS_API_URL",
     "QDRANT_HOST",
     "QDRANT_API_KEY",
     "API_BASE_URL",
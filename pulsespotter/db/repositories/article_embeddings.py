@@ -1,8 +1,10 @@
 import uuid
-from typing import Optional, Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, List, Tuple
 
-from more_itertools import first
-from qdrant_client.http.models import Filter, FieldCondition, MatchValue
+import numpy as np
+from more_itertools import chunked
+from qdrant_client import QdrantClient
 from qdrant_client.http.models import PointStruct
 
 from pulsespotter.db.collections import ARTICLE_EMBEDDINGS_COLLECTION
@@ -10,8 +12,8 @@ from pulsespotter.db.repositories.base import BaseVectorRepository
 
 
 class ArticleEmbeddingsRepository(BaseVectorRepository):
-    def __init__(self):
-        super().__init__()
+    def __init__(self, client: QdrantClient = None):
+        super().__init__(client)
         self._collection_name = ARTICLE_EMBEDDINGS_COLLECTION
         self._collection_info = self._client.get_collection(self.collection_name) if self.collection_exists() else None
 
@@ -40,12 +42,22 @@ class ArticleEmbeddingsRepository(BaseVectorRepository):
         )
         return vector_id, response
 
-    def batch_add_embeddings(self, article_ids: List[str], embeddings):
-        response = []
-        for article_id, embedding in zip(article_ids, embeddings):
-            vector_id, res = self.add_embedding(article_id, embedding)
-            response.append((vector_id, res))
-        return response
+    def batch_add_embeddings(
+            self,
+            article_ids: List[str],
+            embeddings,
+            batch_size: int = 256,
+            wait: bool = True,
+            parallel: int = 1,
+    ):
+        return self.batch_upsert(
+            payload_key="article_id",
+            payload_values=article_ids,
+            embeddings=embeddings,
+            batch_size=batch_size,
+            wait=wait,
+            parallel=parallel,
+        )
 
     def get_embeddings(self, vector_ids: List[str]):
         records = self._client.retrieve(
@@ -58,18 +70,49 @@ class ArticleEmbeddingsRepository(BaseVectorRepository):
             })
         return response
 
+    def get_embeddings_array(
+            self,
+            vector_ids: List[str],
+            chunk_size: int = 1000,
+            max_workers: int = 4,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Retrieves the embeddings in chunks of `chunk_size` ids with up to `max_workers` parallel requests.
+        Returns a float32 matrix with one row per found vector, in the order of `vector_ids`, and the aligned
+        arrays of vector ids and article ids.
+        """
+        if chunk_size <= 0:
+            raise ValueError("Chunk size must be a positive integer.")
+        vector_ids = [str(vector_id) for vector_id in vector_ids]
+        embeddings = np.empty((len(vector_ids), self.vector_size), dtype=np.float32)
+        article_ids = np.empty(len(vector_ids), dtype=object)
+        found = np.zeros(len(vector_ids), dtype=bool)
+
+        def retrieve_chunk(offset: int, chunk: List[str]):
+            positions = {vector_id: offset + idx for idx, vector_id in enumerate(chunk)}
+            records = self._client.retrieve(
+                collection_name=self.collection_name, ids=chunk, with_vectors=True, with_payload=["article_id"],
+            )
+            # every chunk fills its own rows of the preallocated arrays
+            for record in records:
+                position = positions[str(record.id)]
+                embeddings[position] = record.vector
+                article_ids[position] = record.payload["article_id"]
+                found[position] = True
+
+        chunks = list(chunked(vector_ids, chunk_size))
+        offsets = range(0, len(vector_ids), chunk_size)
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(chunks)))) as executor:
+            list(executor.map(retrieve_chunk, offsets, chunks))
+
+        if found.all():
+            return embeddings, np.array(vector_ids, dtype=object), article_ids
+        return embeddings[found], np.array(vector_ids, dtype=object)[found], article_ids[found]
+
     def get_article_embedding(self, article_id: str) -> Optional[Dict]:
-        filter_ = Filter(must=[FieldCondition(key="article_id", match=MatchValue(value=article_id))])
-        search_results = self._client.search(
-            collection_name=self.collection_name,
-            query_vector=[0] * self.vector_size,
-            limit=1,
-            query_filter=filter_,
-            with_vectors=True,
-        )
-        response = first(search_results, None)
-        if response:
-            return {"article_id": article_id, "vector": response.vector}
+        point = self.get_point_by_payload("article_id", article_id, with_vectors=True)
+        if point:
+            return {"article_id": article_id, "vector": point.vector}
 
     def check_embeddings_exist(self, article_ids: List[str]) -> List:
         response = []
@@ -79,15 +122,17 @@ class ArticleEmbeddingsRepository(BaseVectorRepository):
         return response
 
     def search_similar(self, article_id: str, min_similarity: float = 0.8, limit: int = 5):
-        article_embedding = self.get_article_embedding(article_id)
+        # resolve the point id only and let the vector db search by id, so the vector never leaves the server
+        point = self.get_point_by_payload("article_id", article_id, with_vectors=False)
         response = []
-        if article_embedding:
-            similar_points = self._client.search(
+        if point:
+            similar_points = self._client.query_points(
                 collection_name=self.collection_name,
-                query_vector=article_embedding["vector"],
+                query=point.id,
                 limit=limit + 1,
                 score_threshold=min_similarity,
-            )
+                with_payload=True,
+            ).points
             for point in similar_points:
                 similar_article_id = point.payload.get("article_id")
                 if similar_article_id and similar_article_id != article_id:
@@ -1,13 +1,41 @@
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Iterator, Tuple
 
 import pymongo
 from bson import ObjectId
+from pymongo import UpdateOne
 from pymongo.collection import Collection
+from pymongo.errors import DuplicateKeyError, BulkWriteError
 
 from pulsespotter.db.collections import ARTICLES_COLLECTION
 from pulsespotter.db.repositories.base import BaseRepository
 from pulsespotter.ingestion.utils.parse_functions import parse_date
 
+DUPLICATE_KEY_ERROR_CODE = 11000
+
+
+def build_article_record(
+        url: str,
+        site_name: str,
+        raw_date: str,
+        parsed_date: str = None,
+        title: list | str = None,
+        description: list | str = None,
+        paragraphs: list | str = None,
+        visited: bool = True,
+) -> Dict:
+    if raw_date and not parsed_date:
+        parsed_date = parse_date(raw_date)
+    return {
+        "url": url,
+        "site_name": site_name,
+        "raw_date": raw_date,
+        "parsed_date": parsed_date,
+        "title": title,
+        "description": description,
+        "paragraphs": paragraphs,
+        "visited": visited,
+    }
+
 
 class ArticlesRepository(BaseRepository):
     def __init__(self):
@@ -18,6 +46,9 @@ class ArticlesRepository(BaseRepository):
     def collection(self) -> Collection:
         return self._collection
 
+    def ensure_indexes(self):
+        return self._collection.create_index("url", unique=True)
+
     def add_article(
             self,
             url: str,
@@ -29,18 +60,35 @@ class ArticlesRepository(BaseRepository):
             paragraphs: list | str = None,
             visited: bool = True,
     ):
-        if raw_date and not parsed_date:
-            parsed_date = parse_date(raw_date)
-        return self._collection.insert_one({
-            "url": url,
-            "site_name": site_name,
-            "raw_date": raw_date,
-            "parsed_date": parsed_date,
-            "title": title,
-            "description": description,
-            "paragraphs": paragraphs,
-            "visited": visited,
-        })
+        article = build_article_record(
+            url=url,
+            site_name=site_name,
+            raw_date=raw_date,
+            parsed_date=parsed_date,
+            title=title,
+            description=description,
+            paragraphs=paragraphs,
+            visited=visited,
+        )
+        try:
+            return self._collection.insert_one(article)
+        except DuplicateKeyError:
+            # the article was already ingested, e.g. by another scraper running concurrently
+            return None
+
+    def add_articles(self, articles: List[Dict]) -> int:
+        """
+        Inserts the given article records, skipping the ones whose url was already ingested.
+        Returns the number of inserted articles.
+        """
+        if not articles:
+            return 0
+        try:
+            return len(self._collection.insert_many(articles, ordered=False).inserted_ids)
+        except BulkWriteError as e:
+            if any(error["code"] != DUPLICATE_KEY_ERROR_CODE for error in e.details.get("writeErrors", [])):
+                raise
+            return e.details["nInserted"]
 
     def get_article_by_id(self, article_id: str) -> Optional[Dict]:
         article = self._collection.find_one({"_id": ObjectId(article_id)})
@@ -48,6 +96,27 @@ class ArticlesRepository(BaseRepository):
             article["_id"] = str(article["_id"])
         return article
 
+    def get_articles_by_ids(self, article_ids: List[str], projection: List | Dict = None) -> List[Dict]:
+        article_oids = [ObjectId(article_id) for article_id in article_ids]
+        articles = self.query(q={"_id": {"$in": article_oids}}, projection=projection)
+        articles = {article["_id"]: article for article in articles}
+        return [articles[article_id] for article_id in article_ids if article_id in articles]
+
+    def filter_unseen_urls(self, urls: List[str]) -> List[str]:
+        unique_urls = list(dict.fromkeys(urls))
+        seen_urls = {
+            article["url"] for article in self._collection.find({"url": {"$in": unique_urls}}, projection={"url": 1})
+        }
+        return [url for url in unique_urls if url not in seen_urls]
+
+    def iter_site_urls(self, site_name: str, after_id: str = None, batch_size: int = 10000) -> Iterator[Dict]:
+        q = {"site_name": site_name}
+        if after_id is not None:
+            q["_id"] = {"$gt": ObjectId(after_id)}
+        return self.iter_query(
+            q=q, projection=["url"], sort_order=[("_id", pymongo.ASCENDING)], batch_size=batch_size,
+        )
+
     def get_article_by_url(self, url: str) -> Optional[Dict]:
         article = self._collection.find_one({"url": url})
         if article:
@@ -86,6 +155,15 @@ class ArticlesRepository(BaseRepository):
         result = self._collection.update_one({"_id": ObjectId(article_id)}, {"$set": updates})
         return result.modified_count > 0
 
+    def bulk_update_articles(self, updates: List[Tuple[str, Dict]]) -> int:
+        """
+        Applies the `(article_id, updates)` pairs with a single bulk write and returns the number of modified articles.
+        """
+        if not updates:
+            return 0
+        operations = [UpdateOne({"_id": ObjectId(article_id)}, {"$set": fields}) for article_id, fields in updates]
+        return self._collection.bulk_write(operations, ordered=False).modified_count
+
     def delete_article(self, article_id: str) -> bool:
         result = self._collection.delete_one({"_id": ObjectId(article_id)})
         return result.deleted_count > 0
@@ -35,9 +35,9 @@ class ArticlesVectorsRepository(BaseRepository):
             response["_id"] = str(response["_id"])
         return response
 
-    def batch_get(self, article_ids: List[str]) -> List[Dict]:
+    def batch_get(self, article_ids: List[str], projection: List | Dict = None) -> List[Dict]:
         article_oids = [ObjectId(article_id) for article_id in article_ids]
-        return self.query(q={"_id": {"$in": article_oids}})
+        return self.query(q={"_id": {"$in": article_oids}}, projection=projection)
 
     def delete(self, article_id: str) -> bool:
         result = self._collection.delete_one({"_id": ObjectId(article_id)})
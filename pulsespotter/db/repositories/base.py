@@ -1,8 +1,13 @@
+import uuid
 from abc import ABC, abstractmethod
-from typing import List, Dict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Iterator
 
+from more_itertools import first, chunked
 from pymongo.collection import Collection
-from qdrant_client.http.models import Distance, VectorParams, PointStruct
+from qdrant_client import QdrantClient
+from qdrant_client.http.models import Distance, VectorParams, PointStruct, Record
+from qdrant_client.http.models import Filter, FieldCondition, MatchValue
 
 from pulsespotter.db.connections import get_mongo_database, get_vector_database_client
 
@@ -16,27 +21,41 @@ class BaseRepository(ABC):
     def collection(self) -> Collection:
         pass
 
-    def query(
+    def iter_query(
             self,
             q: Dict,
             projection: Dict | List = None,
             sort_order: List = None,
             limit: int = None,
-    ) -> List[Dict]:
+            batch_size: int = None,
+    ) -> Iterator[Dict]:
         documents = self.collection.find(q or {}, projection=projection or {})
         if sort_order:
             documents = documents.sort(sort_order)
         if limit:
             documents = documents.limit(limit)
-        documents = list(documents)
+        if batch_size:
+            documents = documents.batch_size(batch_size)
         for document in documents:
             document["_id"] = str(document.pop("_id"))
-        return documents
+            yield document
+
+    def query(
+            self,
+            q: Dict,
+            projection: Dict | List = None,
+            sort_order: List = None,
+            limit: int = None,
+    ) -> List[Dict]:
+        return list(self.iter_query(q=q, projection=projection, sort_order=sort_order, limit=limit))
+
+    def count(self, q: Dict) -> int:
+        return self.collection.count_documents(q or {})
 
 
 class BaseVectorRepository(ABC):
-    def __init__(self):
-        self._client = get_vector_database_client()
+    def __init__(self, client: QdrantClient = None):
+        self._client = client or get_vector_database_client()
 
     def collection_exists(self) -> bool:
         return self._client.collection_exists(self.collection_name)
@@ -52,6 +71,55 @@ class BaseVectorRepository(ABC):
             ),
         )
 
+    def batch_upsert(
+            self,
+            payload_key: str,
+            payload_values: List[str],
+            embeddings,
+            batch_size: int = 256,
+            wait: bool = True,
+            parallel: int = 1,
+    ) -> List:
+        if batch_size <= 0:
+            raise ValueError("Batch size must be a positive integer.")
+        vector_ids = [str(uuid.uuid4()) for _ in payload_values]
+        points = [
+            PointStruct(id=vector_id, vector=embedding, payload={payload_key: payload_value})
+            for vector_id, payload_value, embedding in zip(vector_ids, payload_values, embeddings)
+        ]
+        chunks = list(chunked(points, batch_size))
+        if not chunks:
+            return []
+
+        def upsert(chunk, wait_):
+            return self._client.upsert(collection_name=self.collection_name, points=chunk, wait=wait_)
+
+        # updates are applied in the order they are received, so when not waiting on every chunk, sending the
+        # last chunk with wait=True acts as a barrier for all the previous ones
+        if parallel > 1:
+            with ThreadPoolExecutor(max_workers=parallel) as executor:
+                responses = list(executor.map(lambda chunk: upsert(chunk, wait), chunks[:-1]))
+        else:
+            responses = [upsert(chunk, wait) for chunk in chunks[:-1]]
+        responses.append(upsert(chunks[-1], True))
+
+        response = []
+        for chunk, chunk_response in zip(chunks, responses):
+            response.extend((point.id, chunk_response) for point in chunk)
+        return response
+
+    def get_point_by_payload(self, key: str, value: str, with_vectors: bool = True) -> Optional[Record]:
+        # a filtered scroll avoids scoring the whole collection against a dummy query vector
+        filter_ = Filter(must=[FieldCondition(key=key, match=MatchValue(value=value))])
+        points, _ = self._client.scroll(
+            collection_name=self.collection_name,
+            scroll_filter=filter_,
+            limit=1,
+            with_payload=False,
+            with_vectors=with_vectors,
+        )
+        return first(points, None)
+
     @property
     @abstractmethod
     def collection_name(self) -> str:
@@ -1,5 +1,5 @@
 from collections import Counter
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Set
 
 from bson import ObjectId
 from pymongo.collection import Collection
@@ -26,21 +26,40 @@ class TopicAssignmentsRepository(BaseRepository):
             assignment_probabilities: list,
             topic_start_date: str,
             topic_end_date: str,
+            topic_ids: Dict[int, ObjectId] = None,
+            assignment_similarities: list = None,
     ):
-        generated_topic_ids = {topic_index: ObjectId() for topic_index in topic_labels}
-        generator = zip(article_ids, article_dates, topic_assignments, assignment_probabilities)
+        """
+        Stores the topic assignments of a week. Assignments of a fitted model carry the membership probability of
+        the clustering, while articles assigned later by similarity to the topic embeddings are given through
+        `assignment_similarities` (with `None` probabilities) and stored with the "transform" assignment method.
+        """
+        # existing topic ids are reused, e.g. when new articles are assigned to the topics of a fitted week
+        topic_ids = topic_ids or {}
+        generated_topic_ids = {topic_index: topic_ids.get(topic_index) or ObjectId() for topic_index in topic_labels}
+        assignment_method = "fit" if assignment_similarities is None else "transform"
+        assignment_similarities = assignment_similarities or [None] * len(article_ids)
+        generator = zip(
+            article_ids, article_dates, topic_assignments, assignment_probabilities, assignment_similarities,
+        )
         payload = []
-        for article_id, article_date, assigned_topic, assignment_probability in generator:
-            payload.append({
+        for article_id, article_date, assigned_topic, assignment_probability, assignment_similarity in generator:
+            # numpy integers, e.g. returned by `BERTopic.transform`, cannot be encoded by bson
+            assigned_topic = int(assigned_topic)
+            assignment = {
                 "document_id": article_id,
                 "document_date": article_date,
                 "topic_index": assigned_topic,
                 "topic_label": topic_labels[assigned_topic],
                 "assignment_probability": assignment_probability,
+                "assignment_method": assignment_method,
                 "topic_start_date": topic_start_date,
                 "topic_end_date": topic_end_date,
                 "topic_id": generated_topic_ids[assigned_topic]
-            })
+            }
+            if assignment_similarity is not None:
+                assignment["assignment_similarity"] = float(assignment_similarity)
+            payload.append(assignment)
         self._collection.insert_many(payload)
         return generated_topic_ids
 
@@ -74,6 +93,17 @@ class TopicAssignmentsRepository(BaseRepository):
         q = {"topic_start_date": topic_start_date, "topic_end_date": topic_end_date}
         return self._collection.find_one(q) is not None
 
+    def get_topic_ids(self, topic_start_date: str, topic_end_date: str) -> Dict[int, ObjectId]:
+        pipeline = [
+            {"$match": {"topic_start_date": topic_start_date, "topic_end_date": topic_end_date}},
+            {"$group": {"_id": "$topic_index", "topic_id": {"$first": "$topic_id"}}},
+        ]
+        return {group["_id"]: group["topic_id"] for group in self._collection.aggregate(pipeline)}
+
+    def get_assigned_document_ids(self, topic_start_date: str, topic_end_date: str) -> Set[str]:
+        q = {"topic_start_date": topic_start_date, "topic_end_date": topic_end_date}
+        return {str(document_id) for document_id in self._collection.distinct("document_id", q)}
+
     def get_trending_topics(self, topic_start_date: str, topic_end_date: str):
         topic_assignments = self.search_topic_assignments(topic_start_date, topic_end_date)
         topic_ids = [
@@ -1,8 +1,7 @@
 import uuid
 from typing import Optional, Dict, List
 
-from more_itertools import first
-from qdrant_client.http.models import Filter, FieldCondition, MatchValue
+from qdrant_client import QdrantClient
 from qdrant_client.http.models import PointStruct
 
 from pulsespotter.db.collections import TOPIC_EMBEDDINGS_COLLECTION
@@ -10,8 +9,8 @@ from pulsespotter.db.repositories.base import BaseVectorRepository
 
 
 class TopicEmbeddingsRepository(BaseVectorRepository):
-    def __init__(self):
-        super().__init__()
+    def __init__(self, client: QdrantClient = None):
+        super().__init__(client)
         self._collection_name = TOPIC_EMBEDDINGS_COLLECTION
         self._collection_info = self._client.get_collection(self.collection_name) if self.collection_exists() else None
 
@@ -40,12 +39,22 @@ class TopicEmbeddingsRepository(BaseVectorRepository):
         )
         return vector_id, response
 
-    def batch_add_embeddings(self, topic_ids: List[str], embeddings):
-        response = []
-        for topic_id, embedding in zip(topic_ids, embeddings):
-            vector_id, res = self.add_embedding(topic_id, embedding)
-            response.append((vector_id, res))
-        return response
+    def batch_add_embeddings(
+            self,
+            topic_ids: List[str],
+            embeddings,
+            batch_size: int = 256,
+            wait: bool = True,
+            parallel: int = 1,
+    ):
+        return self.batch_upsert(
+            payload_key="topic_id",
+            payload_values=topic_ids,
+            embeddings=embeddings,
+            batch_size=batch_size,
+            wait=wait,
+            parallel=parallel,
+        )
 
     def get_embeddings(self, vector_ids: List[str]):
         records = self._client.retrieve(
@@ -59,28 +68,22 @@ class TopicEmbeddingsRepository(BaseVectorRepository):
         return response
 
     def get_topic_embedding(self, topic_id: str) -> Optional[Dict]:
-        filter_ = Filter(must=[FieldCondition(key="topic_id", match=MatchValue(value=topic_id))])
-        search_results = self._client.search(
-            collection_name=self.collection_name,
-            query_vector=[0] * self.vector_size,
-            limit=1,
-            query_filter=filter_,
-            with_vectors=True,
-        )
-        response = first(search_results, None)
-        if response:
-            return {"topic_id": topic_id, "vector": response.vector}
+        point = self.get_point_by_payload("topic_id", topic_id, with_vectors=True)
+        if point:
+            return {"topic_id": topic_id, "vector": point.vector}
 
     def search_similar(self, topic_id: str, min_similarity: float = 0.8, limit: int = 5):
-        topic_embedding = self.get_topic_embedding(topic_id)
+        # resolve the point id only and let the vector db search by id, so the vector never leaves the server
+        point = self.get_point_by_payload("topic_id", topic_id, with_vectors=False)
         response = []
-        if topic_embedding:
-            similar_points = self._client.search(
+        if point:
+            similar_points = self._client.query_points(
                 collection_name=self.collection_name,
-                query_vector=topic_embedding["vector"],
+                query=point.id,
                 limit=limit + 1,
                 score_threshold=min_similarity,
-            )
+                with_payload=True,
+            ).points
             for point in similar_points:
                 similar_topic_id = point.payload.get("topic_id")
                 if similar_topic_id and similar_topic_id != topic_id:
@@ -35,9 +35,9 @@ class TopicsVectorsRepository(BaseRepository):
             response["_id"] = str(response["_id"])
         return response
 
-    def batch_get(self, topic_ids: List[str]) -> List[Dict]:
+    def batch_get(self, topic_ids: List[str], projection: List | Dict = None) -> List[Dict]:
         topic_oids = [ObjectId(topic_id) for topic_id in topic_ids]
-        return self.query(q={"_id": {"$in": topic_oids}})
+        return self.query(q={"_id": {"$in": topic_oids}}, projection=projection)
 
     def delete(self, topic_id: str) -> bool:
         result = self._collection.delete_one({"_id": ObjectId(topic_id)})
@@ -54,7 +54,13 @@ if __name__ == '__main__':
         topic_link = f"/topic_info?topic_id={topic_id}"
         st.markdown(f'Assigned topic: <a href="{topic_link}" target="_self">{topic_label}</a>',
                     unsafe_allow_html=True)
-        st.write(f"Topic assignment probability: {safe_get_article_field(article_data, 'topic_assignment_probability')}")
+        # articles assigned after the topics of their week were fitted have a similarity instead of a probability
+        if article_data.get("topic_assignment_similarity") is not None:
+            assignment_similarity = safe_get_article_field(article_data, "topic_assignment_similarity")
+            st.write(f"Topic similarity: {assignment_similarity}")
+        else:
+            assignment_probability = safe_get_article_field(article_data, "topic_assignment_probability")
+            st.write(f"Topic assignment probability: {assignment_probability}")
         st.write("---")
 
         st.header("Content")
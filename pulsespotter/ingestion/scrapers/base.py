@@ -1,31 +1,123 @@
+import asyncio
 import datetime
 import re
 from abc import abstractmethod, ABC
+from dataclasses import dataclass
 from urllib.parse import urljoin
 
+import aiohttp
 import requests
+from requests.adapters import HTTPAdapter
 from scrapy import Selector
-from tenacity import retry, stop_after_attempt, wait_exponential
+from urllib3.util.retry import Retry, RequestHistory
 
-from pulsespotter.config import ZENROWS_API_KEY
+from pulsespotter.config import ZENROWS_API_KEY, ZENROWS_API_URL, RESOURCES_DIR
+from pulsespotter.db.repositories.articles import ArticlesRepository, build_article_record
+from pulsespotter.ingestion.utils.bloom_filter import BloomFilter
 from pulsespotter.ingestion.utils.data_models import NewsScraperParams
+from pulsespotter.ingestion.utils.parse_utils import (
+        compile_xpath, compile_scrape_patterns, xpath_exists, xpath_get, xpath_getall,
+)
+from pulsespotter.ingestion.utils.request_budget import RequestBudget
+from pulsespotter.ingestion.utils.response_cache import ResponseCache
+from pulsespotter.ingestion.utils.write_buffer import ArticleWriteBuffer
 from pulsespotter.utils.logging_meta import LoggingMeta
 
+URL_FILTERS_DIR = RESOURCES_DIR.joinpath("url_filters")
+RESPONSE_CACHE_DIR = RESOURCES_DIR.joinpath("response_cache")
+# transient errors of the scraping API, e.g. 422 when ZenRows could not get the content of the page
+RETRY_STATUS_CODES = [408, 422, 429, 500, 502, 503, 504]
+
+
+@dataclass
+class ScraperStats:
+    pages: int = 0
+    articles: int = 0
+    requests: int = 0
+    cached_responses: int = 0
+
 
 class NewsScraper(ABC, metaclass=LoggingMeta):
+    zenrows_api_url = ZENROWS_API_URL
 
     @staticmethod
     def config_schema():
         pass
 
-    @staticmethod
-    @retry(stop=stop_after_attempt(5), wait=wait_exponential(multiplier=1, min=4, max=10))
-    def get_page_source(url: str, zenrows_request_params: dict):
+    def _acquire_request(self):
+        if self.request_budget is not None:
+            self.request_budget.acquire()
+        self.stats.requests += 1
+
+    def _get_cached_page_source(self, url: str, zenrows_request_params: dict):
+        if self.response_cache is None:
+            return None
+        page_source = self.response_cache.get(url, zenrows_request_params)
+        if page_source is not None:
+            self.stats.cached_responses += 1
+        return page_source
+
+    def _cache_page_source(self, url: str, zenrows_request_params: dict, page_source: str):
+        if self.response_cache is not None:
+            self.response_cache.put(url, zenrows_request_params, page_source)
+
+    def get_page_source(self, url: str, zenrows_request_params: dict, use_cache: bool = False):
+        # only article pages are cached, listing pages change between runs and are always fetched
+        if use_cache and (page_source := self._get_cached_page_source(url, zenrows_request_params)) is not None:
+            return page_source
+        self._acquire_request()
         params = {"url": url, "apikey": ZENROWS_API_KEY, **zenrows_request_params}
-        response = requests.get("https://api.zenrows.com/v1/", params=params)
+        response = self.session.get(self.zenrows_api_url, params=params, timeout=self._http_timeout)
         response.raise_for_status()
+        if use_cache:
+            self._cache_page_source(url, zenrows_request_params, response.text)
         return response.text
 
+    async def _aget_with_retries(self, session: aiohttp.ClientSession, semaphore: asyncio.Semaphore, params: dict):
+        # follows the same retry policy as the requests session, waiting outside the semaphore between attempts
+        retry_policy = self._retry_policy
+        while True:
+            error, status = None, None
+            # the semaphore bounds the number of in-flight requests per site
+            async with semaphore:
+                if not retry_policy.history:
+                    self._acquire_request()
+                try:
+                    async with session.get(self.zenrows_api_url, params=params) as response:
+                        if not retry_policy.is_retry("GET", response.status):
+                            response.raise_for_status()
+                            return await response.text()
+                        status = response.status
+                        error = aiohttp.ClientResponseError(
+                            response.request_info, response.history, status=response.status, message=response.reason,
+                        )
+                except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError) as e:
+                    error = e
+            retry_policy = retry_policy.new(
+                total=retry_policy.total - 1,
+                history=retry_policy.history + (RequestHistory("GET", self.zenrows_api_url, error, status, None),),
+            )
+            if retry_policy.is_exhausted():
+                raise error
+            await asyncio.sleep(retry_policy.get_backoff_time())
+
+    async def aget_page_source(
+            self,
+            session: aiohttp.ClientSession,
+            semaphore: asyncio.Semaphore,
+            url: str,
+            zenrows_request_params: dict,
+            use_cache: bool = False,
+    ):
+        if use_cache and (page_source := self._get_cached_page_source(url, zenrows_request_params)) is not None:
+            return page_source
+        params = {"url": url, "apikey": ZENROWS_API_KEY, **zenrows_request_params}
+        params = {key: value for key, value in params.items() if value is not None}
+        page_source = await self._aget_with_retries(session, semaphore, params)
+        if use_cache:
+            self._cache_page_source(url, zenrows_request_params, page_source)
+        return page_source
+
     def __init__(self, params: NewsScraperParams):
         self._site_name = params.site_name
         self._base_url = params.base_url
@@ -35,47 +127,214 @@ class NewsScraper(ABC, metaclass=LoggingMeta):
         self._scrape_patterns = params.scrape_patterns
         self._blacklisted_urls = params.blacklisted_urls
         self._blacklisted_url_patterns = params.blacklisted_url_patterns
+        # xpaths and blacklist patterns are compiled once per scraper, which also rejects invalid configs early
+        self._site_elements_xpaths = {
+            name: compile_xpath(pattern)
+            for name, pattern in self._site_elements_patterns.model_dump().items() if pattern
+        }
+        if self._site_elements_patterns.active_page_pattern:
+            self._site_elements_xpaths["active_page_text_pattern"] = compile_xpath(
+                f"{self._site_elements_patterns.active_page_pattern}/text()"
+            )
+        self._scrape_xpaths = compile_scrape_patterns(self._scrape_patterns)
+        self._blacklisted_url_regex = None
+        if self._blacklisted_url_patterns:
+            self._blacklisted_url_regex = re.compile(
+                "|".join(f"(?:{pattern})" for pattern in self._blacklisted_url_patterns)
+            )
+        self._max_concurrent_requests = params.max_concurrent_requests
+        self._http_pool_size = params.http_pool_size
+        self._http_timeout = (params.http_connect_timeout, params.http_read_timeout)
+        self._http_max_retries = params.http_max_retries
+        self._http_backoff_factor = params.http_backoff_factor
+        self._retry_policy = self._build_retry_policy()
+        self._use_url_filter = params.use_url_filter
+        self._url_filter_capacity = params.url_filter_capacity
+        self._url_filter_error_rate = params.url_filter_error_rate
+        self._write_buffer_size = params.write_buffer_size
+        self._write_buffer_max_delay = params.write_buffer_max_delay
+        self._articles_repository = None
+        self._article_buffer = None
+        # set by the caller to share a request quota between scrapers and to cache the article pages
+        self.request_budget: RequestBudget | None = None
+        self.response_cache: ResponseCache | None = None
+        self.stats = ScraperStats()
+        self._session = None
+        self._url_filter = None
+        self._url_filter_last_id = None
 
-    def _should_crawl_page(self, page_source: str):
-        selector = Selector(text=page_source)
-        must_exist_pattern = self._site_elements_patterns.must_exist_pattern
-        if selector.xpath(must_exist_pattern).get() is None:
-            return False
-        return True
+    def _build_retry_policy(self) -> Retry:
+        return Retry(
+            total=self._http_max_retries,
+            backoff_factor=self._http_backoff_factor,
+            backoff_max=10,
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=["GET"],
+            raise_on_status=False,
+        )
+
+    def _build_session(self) -> requests.Session:
+        # connections to the scraping API are kept alive and reused, and failed requests are retried
+        # with exponential backoff by the connection pool itself
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=self._http_pool_size, max_retries=self._retry_policy,
+        )
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def _build_async_session(self) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(limit=self._http_pool_size)
+        timeout = aiohttp.ClientTimeout(sock_connect=self._http_timeout[0], sock_read=self._http_timeout[1])
+        return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+    @property
+    def session(self) -> requests.Session:
+        if self._session is None:
+            self._session = self._build_session()
+        return self._session
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+        if self._article_buffer is not None:
+            self._article_buffer.close()
+            self.logger.info(
+                f"Inserted {self._article_buffer.num_inserted} articles "
+                f"({self._article_buffer.num_duplicates} already ingested)."
+            )
+            self._article_buffer = None
+        if self._url_filter is not None:
+            self.save_url_filter()
+
+    @property
+    def url_filter_path(self):
+        return URL_FILTERS_DIR.joinpath(f"{self._site_name}.bloom")
+
+    def warm_url_filter(self) -> BloomFilter | None:
+        """
+        Loads the persisted filter of ingested urls of the site and adds the urls ingested since it was saved,
+        or builds it from all urls of the site when there is no usable filter yet.
+        """
+        if self._url_filter is not None or not self._use_url_filter:
+            return self._url_filter
+        url_filter, last_id = None, None
+        if self.url_filter_path.exists():
+            try:
+                url_filter, metadata = BloomFilter.load(self.url_filter_path)
+                last_id = metadata.get("last_id")
+            except (OSError, ValueError) as e:
+                self.logger.warning(f"Could not load the url filter of {self._site_name}: {e}")
+        if url_filter is not None:
+            last_id = self._add_ingested_urls(url_filter, last_id)
+        # checked after adding the new urls, which might be the ones saturating the filter
+        if url_filter is None or url_filter.is_saturated:
+            num_articles = self.articles_repository.count({"site_name": self._site_name})
+            url_filter = BloomFilter(
+                capacity=max(self._url_filter_capacity, 2 * num_articles), error_rate=self._url_filter_error_rate,
+            )
+            last_id = self._add_ingested_urls(url_filter)
+        self.logger.info(f"Url filter of {self._site_name} holds {url_filter.count} urls.")
+        self._url_filter, self._url_filter_last_id = url_filter, last_id
+        return url_filter
+
+    def _add_ingested_urls(self, url_filter: BloomFilter, after_id: str = None) -> str | None:
+        """
+        Adds the urls of the site ingested after `after_id` to the filter and returns the id of the last one.
+        """
+        # object ids only roughly follow insertion order across processes, so a url inserted concurrently might be
+        # missed here; the unique url index still rejects it if it is scraped again
+        last_id = after_id
+        for article in self.articles_repository.iter_site_urls(self._site_name, after_id=after_id):
+            url_filter.add(article["url"])
+            last_id = article["_id"]
+        return last_id
+
+    def save_url_filter(self):
+        # also moves past the urls ingested during this run, so that the next run does not read them again
+        self._url_filter_last_id = self._add_ingested_urls(self._url_filter, self._url_filter_last_id)
+        self._url_filter.save(self.url_filter_path, metadata={"last_id": self._url_filter_last_id})
+
+    @property
+    def article_buffer(self) -> ArticleWriteBuffer:
+        if self._article_buffer is None:
+            self._article_buffer = ArticleWriteBuffer(
+                self.articles_repository, max_size=self._write_buffer_size, max_delay=self._write_buffer_max_delay,
+            )
+        return self._article_buffer
+
+    def _is_url_pending(self, url: str) -> bool:
+        return self._article_buffer is not None and url in self._article_buffer
+
+    def _save_article(self, url: str, parsed_content: dict):
+        # the article is written in the background, its url counts as ingested from now on
+        self.article_buffer.add(
+            build_article_record(url=url, site_name=self._site_name, visited=True, **parsed_content)
+        )
+        self.stats.articles += 1
+        if self._url_filter is not None:
+            self._url_filter.add(url)
+
+    def _flush_articles(self):
+        if self._article_buffer is not None:
+            self._article_buffer.flush()
+
+    @property
+    def articles_repository(self) -> ArticlesRepository:
+        if self._articles_repository is None:
+            self._articles_repository = ArticlesRepository()
+        return self._articles_repository
+
+    def _should_crawl_page(self, selector: Selector):
+        return xpath_exists(selector, self._site_elements_xpaths["must_exist_pattern"])
 
     def _should_scrape_article(self, url):
-        for blacklist_pattern in self._blacklisted_url_patterns:
-            if re.search(blacklist_pattern, url):
-                return False
+        if self._blacklisted_url_regex is not None and self._blacklisted_url_regex.search(url):
+            return False
         return True
 
-    def _find_article_urls(self, page_source: str):
-        selector = Selector(text=page_source)
-        articles_pattern = self._site_elements_patterns.articles_pattern
-        found_urls = selector.xpath(articles_pattern).getall()
+    def _select_article_urls(self, article_urls: list):
+        candidate_urls = [
+            article_url for article_url in article_urls
+            if article_url.startswith(self._base_url) and self._should_scrape_article(article_url)
+            and not self._is_url_pending(article_url)
+        ]
+        if not self._use_url_filter:
+            # check which article urls were not ingested yet with a single query per page
+            return self.articles_repository.filter_unseen_urls(candidate_urls)
+        # urls missing from the filter were certainly not ingested, only the possible positives are confirmed
+        url_filter = self.warm_url_filter()
+        candidate_urls = list(dict.fromkeys(candidate_urls))
+        possibly_seen_urls = {url for url in candidate_urls if url in url_filter}
+        if not possibly_seen_urls:
+            return candidate_urls
+        unseen_urls = set(self.articles_repository.filter_unseen_urls(list(possibly_seen_urls)))
+        return [url for url in candidate_urls if url not in possibly_seen_urls or url in unseen_urls]
+
+    def _find_article_urls(self, selector: Selector):
+        found_urls = xpath_getall(selector, self._site_elements_xpaths["articles_pattern"])
         return [urljoin(self._base_url, url) for url in found_urls]
 
-    def _check_page_limit_reached(self, page_content, max_num_pages: int):
-        selector = Selector(text=page_content)
-        active_page_pattern = self._site_elements_patterns.active_page_pattern
-        if active_page_pattern is None:
+    def _check_page_limit_reached(self, selector: Selector, max_num_pages: int):
+        active_page_xpath = self._site_elements_xpaths.get("active_page_pattern")
+        if active_page_xpath is None:
             return False
-        active_page_element = selector.xpath(active_page_pattern).get()
-        if active_page_element is None:
+        if not xpath_exists(selector, active_page_xpath):
             return False
-        active_page = selector.xpath(f"""{active_page_pattern}/text()""").get()
+        active_page = xpath_get(selector, self._site_elements_xpaths["active_page_text_pattern"])
         if not active_page:
             self.logger.warning("Active page pattern provided but active page element not found.")
             return False
         active_page = int(active_page.strip())
         return active_page > max_num_pages
 
-    def _get_next_page(self, page_content):
-        next_page_pattern = self._site_elements_patterns.next_page_pattern
-        if next_page_pattern is None:
+    def _get_next_page(self, selector: Selector):
+        next_page_xpath = self._site_elements_xpaths.get("next_page_pattern")
+        if next_page_xpath is None:
             return None
-        selector = Selector(text=page_content)
-        next_page_url = selector.xpath(next_page_pattern).get()
+        next_page_url = xpath_get(selector, next_page_xpath)
         if next_page_url is not None:
             next_page_url = next_page_url.lstrip(" ").lstrip("@")
             next_page_url = urljoin(self._base_url, next_page_url)
@@ -1,13 +1,17 @@
+import asyncio
 import datetime
-from collections import deque
 
 from pandas import date_range
+from scrapy import Selector
 
-from pulsespotter.db.repositories.articles import ArticlesRepository
+from pulsespotter.config import RESOURCES_DIR
+from pulsespotter.ingestion.utils.crawl_frontier import CrawlFrontier
 from pulsespotter.ingestion.utils.data_models import NewsArchiveScraperParams
 from pulsespotter.ingestion.utils.parse_utils import parse_website
 from pulsespotter.ingestion.scrapers.base import NewsScraper
 
+CRAWL_FRONTIERS_DIR = RESOURCES_DIR.joinpath("crawl_frontiers")
+
 
 class NewsArchiveScraper(NewsScraper):
 
@@ -19,6 +23,8 @@ class NewsArchiveScraper(NewsScraper):
         super().__init__(params)
         self._search_url_templates = params.search_url_templates
         self._overwrite_date_if_not_exists = params.overwrite_date_if_not_exists
+        self._resume_crawls = params.resume_crawls
+        self._crawl_frontier_max_age_days = params.crawl_frontier_max_age_days
 
     def _get_start_urls(self, start_date: datetime.datetime, end_date: datetime.datetime = None):
         if end_date is None:
@@ -35,59 +41,151 @@ class NewsArchiveScraper(NewsScraper):
         start_urls = sorted([(date, start_url) for start_url, date in start_urls.items()], reverse=True)
         return start_urls
 
+    def _open_frontier(
+            self, start_date: datetime.datetime, page_limit: int, end_date: datetime.datetime = None,
+    ) -> CrawlFrontier:
+        job = f"{start_date:%Y-%m-%d}:{(end_date or start_date):%Y-%m-%d}:{page_limit}"
+        path = CRAWL_FRONTIERS_DIR.joinpath(f"{self._site_name}.sqlite") if self._resume_crawls else ":memory:"
+        frontier = CrawlFrontier(path, job, max_age_days=self._crawl_frontier_max_age_days)
+        if frontier.start(self._get_start_urls(start_date, end_date)):
+            self.logger.info(
+                f"Resuming crawl {job} of {self._site_name}: "
+                f"{frontier.num_visited} pages visited, {frontier.num_pending} pages pending."
+            )
+        return frontier
+
+    def _complete_page(self, frontier: CrawlFrontier, url: str, last_evaluated_date: str, next_url: str = None):
+        # the articles of the page are written before it counts as visited, so that a crash cannot lose them
+        self._flush_articles()
+        frontier.complete(url, last_evaluated_date, next_url)
+
+    def _store_article(self, article_url: str, article_content: str, start_url_date: str, start_date: str):
+        parsed_content = parse_website(article_content, self._scrape_patterns, self._scrape_xpaths)
+        if self._overwrite_date_if_not_exists:
+            parsed_content["parsed_date"] = parsed_content.get("parsed_date") or start_url_date
+            parsed_content["raw_date"] = parsed_content.get("raw_date") or start_url_date
+        date_limit_reached = False
+        if (article_date := parsed_content.get("parsed_date")) is not None:
+            date_limit_reached = article_date < start_date
+        self._save_article(article_url, parsed_content)
+        return article_date, date_limit_reached
+
     def _run(self, start_date: datetime.datetime, page_limit: int, end_date: datetime.datetime = None):
 
         self.logger.info(f"Starting scraper for {self._base_url}:")
         self.logger.info(f"start_date: {start_date}; end_date: {end_date}; page_limit: {page_limit}")
-        articles_repository = ArticlesRepository()
 
         crawl_req_params = self._crawler_request_params.model_dump(exclude_unset=True)
         scrape_req_params = self._scraper_request_params.model_dump(exclude_unset=True)
-        start_urls = deque(self._get_start_urls(start_date, end_date))
-
-        while len(start_urls) > 0:
-            self.logger.info(f"{len(start_urls)} urls left to crawl ...")
-            start_url_date, start_url = start_urls.popleft()
-            last_evaluated_date = start_url_date
-            page_content = self.get_page_source(start_url, crawl_req_params)
-            if self._check_page_limit_reached(page_content, page_limit):
-                self.logger.info(f"Page limit reached for site: {start_url} ...")
-                continue
-
-            self.logger.info(f"Crawling {start_url} ...")
-            article_urls = self._find_article_urls(page_content)
-            date_limit_reached = False
-            self.logger.info(f"Found {len(article_urls)} articles.")
-
-            for article_url in article_urls:
-                if not article_url.startswith(self._base_url):
+        with self._open_frontier(start_date, page_limit, end_date) as frontier:
+            while (pending_page := frontier.next_pending()) is not None:
+                self.logger.info(f"{frontier.num_pending} urls left to crawl ...")
+                start_url_date, start_url, _ = pending_page
+                last_evaluated_date = start_url_date
+                # the page is parsed once and the selector is shared by all checks below
+                page_content = self.get_page_source(start_url, crawl_req_params)
+                self.stats.pages += 1
+                page_selector = Selector(text=page_content)
+                if self._check_page_limit_reached(page_selector, page_limit):
+                    self.logger.info(f"Page limit reached for site: {start_url} ...")
+                    self._complete_page(frontier, start_url, last_evaluated_date)
                     continue
-                # check if article url already ingested
-                if not articles_repository.get_article_by_url(article_url) and self._should_scrape_article(article_url):
+
+                self.logger.info(f"Crawling {start_url} ...")
+                article_urls = self._find_article_urls(page_selector)
+                date_limit_reached = False
+                self.logger.info(f"Found {len(article_urls)} articles.")
+
+                for article_url in self._select_article_urls(article_urls):
                     self.logger.info(f"Extracting content from {article_url} ...")
-                    article_content = self.get_page_source(article_url, scrape_req_params)
-                    parsed_content = parse_website(article_content, self._scrape_patterns)
-                    if self._overwrite_date_if_not_exists:
-                        parsed_content["parsed_date"] = parsed_content.get("parsed_date") or start_url_date
-                        parsed_content["raw_date"] = parsed_content.get("raw_date") or start_url_date
-                    if (article_date := parsed_content.get("parsed_date")) is not None:
-                        date_limit_reached = article_date < start_date.strftime("%Y-%m-%d")
-                    articles_repository.add_article(
-                        url=article_url, site_name=self._site_name, visited=True, **parsed_content
+                    article_content = self.get_page_source(article_url, scrape_req_params, use_cache=True)
+                    last_evaluated_date, date_limit_reached = self._store_article(
+                        article_url, article_content, start_url_date, start_date.strftime("%Y-%m-%d"),
                     )
-                    last_evaluated_date = article_date
+                    if date_limit_reached:
+                        break
+
                 if date_limit_reached:
-                    break
+                    self.logger.info(f"Date limit reached. Interrupting crawler for {start_url} ...")
+                    self._complete_page(frontier, start_url, last_evaluated_date)
+                    continue
 
-            if date_limit_reached:
-                self.logger.info(f"Date limit reached. Interrupting crawler for {start_url} ...")
-                continue
+                next_page_url = self._get_next_page(page_selector)
+                self._complete_page(frontier, start_url, last_evaluated_date, next_page_url)
+                if next_page_url is not None:
+                    self.logger.info(f"Visiting next page ...")
+            frontier.finish()
 
-            next_page_url = self._get_next_page(page_content)
-            if next_page_url is not None:
-                start_urls.appendleft((last_evaluated_date, next_page_url))
-                self.logger.info(f"Visiting next page ...")
+        self._flush_articles()
+        self.logger.info(f"Successfully crawled articles from {self._base_url}.")
 
+    async def _arun(self, start_date: datetime.datetime, page_limit: int, end_date: datetime.datetime = None):
+
+        self.logger.info(f"Starting concurrent scraper for {self._base_url}:")
+        self.logger.info(
+            f"start_date: {start_date}; end_date: {end_date}; page_limit: {page_limit}; "
+            f"max_concurrent_requests: {self._max_concurrent_requests}"
+        )
+
+        crawl_req_params = self._crawler_request_params.model_dump(exclude_unset=True)
+        scrape_req_params = self._scraper_request_params.model_dump(exclude_unset=True)
+        semaphore = asyncio.Semaphore(self._max_concurrent_requests)
+
+        with self._open_frontier(start_date, page_limit, end_date) as frontier:
+            async with self._build_async_session() as session:
+                while (pending_page := frontier.next_pending()) is not None:
+                    self.logger.info(f"{frontier.num_pending} urls left to crawl ...")
+                    start_url_date, start_url, _ = pending_page
+                    last_evaluated_date = start_url_date
+                    page_content = await self.aget_page_source(session, semaphore, start_url, crawl_req_params)
+                    self.stats.pages += 1
+                    page_selector = Selector(text=page_content)
+                    if self._check_page_limit_reached(page_selector, page_limit):
+                        self.logger.info(f"Page limit reached for site: {start_url} ...")
+                        self._complete_page(frontier, start_url, last_evaluated_date)
+                        continue
+
+                    self.logger.info(f"Crawling {start_url} ...")
+                    article_urls = self._find_article_urls(page_selector)
+                    date_limit_reached = False
+                    self.logger.info(f"Found {len(article_urls)} articles.")
+
+                    # fetch all articles of the page concurrently, but store them in page order so that the
+                    # date limit is evaluated exactly as in the sequential mode
+                    selected_urls = self._select_article_urls(article_urls)
+                    tasks = [
+                        asyncio.create_task(
+                            self.aget_page_source(session, semaphore, article_url, scrape_req_params, use_cache=True)
+                        )
+                        for article_url in selected_urls
+                    ]
+                    try:
+                        for article_url, task in zip(selected_urls, tasks):
+                            self.logger.info(f"Extracting content from {article_url} ...")
+                            article_content = await task
+                            last_evaluated_date, date_limit_reached = self._store_article(
+                                article_url, article_content, start_url_date, start_date.strftime("%Y-%m-%d"),
+                            )
+                            if date_limit_reached:
+                                break
+                    finally:
+                        # drop the requests of articles beyond the date limit
+                        for task in tasks:
+                            task.cancel()
+                        await asyncio.gather(*tasks, return_exceptions=True)
+
+                    if date_limit_reached:
+                        self.logger.info(f"Date limit reached. Interrupting crawler for {start_url} ...")
+                        self._complete_page(frontier, start_url, last_evaluated_date)
+                        continue
+
+                    next_page_url = self._get_next_page(page_selector)
+                    self._complete_page(frontier, start_url, last_evaluated_date, next_page_url)
+                    if next_page_url is not None:
+                        self.logger.info("Visiting next page ...")
+            frontier.finish()
+
+        self._flush_articles()
         self.logger.info(f"Successfully crawled articles from {self._base_url}.")
 
     def run_between(self, start_date: datetime.datetime, end_date: datetime.datetime, page_limit: int):
@@ -95,3 +193,9 @@ class NewsArchiveScraper(NewsScraper):
 
     def run(self, date: datetime.datetime, page_limit: int):
         self._run(start_date=date, page_limit=page_limit)
+
+    def run_between_concurrently(self, start_date: datetime.datetime, end_date: datetime.datetime, page_limit: int):
+        asyncio.run(self._arun(start_date=start_date, end_date=end_date, page_limit=page_limit))
+
+    def run_concurrently(self, date: datetime.datetime, page_limit: int):
+        asyncio.run(self._arun(start_date=date, page_limit=page_limit))
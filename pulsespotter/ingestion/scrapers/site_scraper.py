@@ -4,9 +4,8 @@ from urllib.parse import urljoin
 
 from scrapy.selector import Selector
 
-from pulsespotter.db.repositories.articles import ArticlesRepository
 from pulsespotter.ingestion.utils.data_models import NewsScraperParams
-from pulsespotter.ingestion.utils.parse_utils import parse_website
+from pulsespotter.ingestion.utils.parse_utils import parse_website, xpath_getall
 from pulsespotter.ingestion.scrapers.base import NewsScraper
 
 
@@ -19,10 +18,8 @@ class NewsSiteScraper(NewsScraper):
     def __init__(self, params: NewsScraperParams):
         super().__init__(params)
 
-    def _get_start_urls(self, page_source: str):
-        selector = Selector(text=page_source)
-        topics_urls_pattern = self._site_elements_patterns.topics_urls_pattern
-        found_urls = selector.xpath(topics_urls_pattern).getall()
+    def _get_start_urls(self, selector: Selector):
+        found_urls = xpath_getall(selector, self._site_elements_xpaths["topics_urls_pattern"])
         found_urls = [urljoin(self._base_url, url) for url in found_urls]
         found_urls = [url for url in found_urls if url.startswith(self._base_url)]
         found_urls = [url for url in found_urls if url not in self._blacklisted_urls]
@@ -32,14 +29,14 @@ class NewsSiteScraper(NewsScraper):
 
         self.logger.info(f"Starting scraper for {self._base_url}:")
         self.logger.info(f"start_date: None; end_date: {end_date}; page_limit: {page_limit}")
-        articles_repository = ArticlesRepository()
 
         crawl_req_params = self._crawler_request_params.model_dump(exclude_unset=True)
         scrape_req_params = self._scraper_request_params.model_dump(exclude_unset=True)
 
         # extract start urls from the first page
         first_page_content = self.get_page_source(self._base_url, crawl_req_params)
-        start_urls = deque(self._get_start_urls(first_page_content))
+        self.stats.pages += 1
+        start_urls = deque(self._get_start_urls(Selector(text=first_page_content)))
         self.logger.info(f"Found {len(start_urls)} start URLs ...")
 
         while len(start_urls) > 0:
@@ -47,31 +44,28 @@ class NewsSiteScraper(NewsScraper):
 
             # check if page has relevant structure for scraping articles
             start_url = start_urls.popleft()
+            # the page is parsed once and the selector is shared by all checks below
             page_content = self.get_page_source(start_url, crawl_req_params)
-            if not self._should_crawl_page(page_content):
+            self.stats.pages += 1
+            page_selector = Selector(text=page_content)
+            if not self._should_crawl_page(page_selector):
                 self.logger.info(f"Skipping {start_url} ...")
                 continue
 
-            if self._check_page_limit_reached(page_content, page_limit):
+            if self._check_page_limit_reached(page_selector, page_limit):
                 self.logger.info(f"Page limit reached for site: {start_url} ...")
                 continue
 
             self.logger.info(f"Crawling {start_url} ...")
-            article_urls = self._find_article_urls(page_content)
+            article_urls = self._find_article_urls(page_selector)
             date_limit_reached = False
-            for article_url in article_urls:
-                if not article_url.startswith(self._base_url):
-                    continue
-                # check if article url already ingested
-                if not articles_repository.get_article_by_url(article_url) and self._should_scrape_article(article_url):
-                    self.logger.info(f"Extracting content from {article_url} ...")
-                    article_content = self.get_page_source(article_url, scrape_req_params)
-                    parsed_content = parse_website(article_content, self._scrape_patterns)
-                    if (article_date := parsed_content.get("parsed_date")) is not None:
-                        date_limit_reached = article_date < end_date.strftime("%Y-%m-%d")
-                    articles_repository.add_article(
-                        url=article_url, site_name=self._site_name, visited=True, **parsed_content
-                    )
+            for article_url in self._select_article_urls(article_urls):
+                self.logger.info(f"Extracting content from {article_url} ...")
+                article_content = self.get_page_source(article_url, scrape_req_params, use_cache=True)
+                parsed_content = parse_website(article_content, self._scrape_patterns, self._scrape_xpaths)
+                if (article_date := parsed_content.get("parsed_date")) is not None:
+                    date_limit_reached = article_date < end_date.strftime("%Y-%m-%d")
+                self._save_article(article_url, parsed_content)
                 if date_limit_reached:
                     break
 
@@ -79,11 +73,12 @@ class NewsSiteScraper(NewsScraper):
                 self.logger.info(f"Date limit reached. Interrupting crawler for {start_url} ...")
                 continue
 
-            next_page_url = self._get_next_page(page_content)
+            next_page_url = self._get_next_page(page_selector)
             if next_page_url is not None:
                 start_urls.appendleft(next_page_url)
                 self.logger.info(f"Visiting next page ...")
 
+        self._flush_articles()
         self.logger.info(f"Successfully crawled articles from {self._base_url}.")
 
     def run_between(self, start_date: datetime.datetime, end_date: datetime.datetime, page_limit: int):
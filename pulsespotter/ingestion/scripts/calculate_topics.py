@@ -1,8 +1,11 @@
 import argparse
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import timedelta
-from typing import List
+from pathlib import Path
+from typing import Dict, List, Optional, Set
 
-import numpy as np
 import openai
 import pandas as pd
 from bertopic import BERTopic
@@ -12,6 +15,7 @@ from bson import ObjectId
 from hdbscan import HDBSCAN
 from sklearn.feature_extraction.text import CountVectorizer
 from qdrant_client.http.models import Distance
+from threadpoolctl import threadpool_limits
 from tqdm import tqdm
 from umap import UMAP
 
@@ -20,6 +24,14 @@ from pulsespotter.db.dao import *
 from pulsespotter.ingestion.utils.parse_functions import parse_date
 from pulsespotter.utils.logging_utils import get_logger
 
+# environment variables read by the BLAS, OpenMP and numba thread pools when they are loaded
+THREAD_LIMIT_ENV_VARS = [
+    "OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "VECLIB_MAXIMUM_THREADS", "NUMEXPR_NUM_THREADS",
+    "NUMBA_NUM_THREADS",
+]
+# fitted models of every week, used to assign articles which are added to a week later on
+TOPIC_MODELS_DIR = RESOURCES_DIR.joinpath("topic_models")
+
 
 def get_weeks_in_range(start_date: str, end_date: str):
     mondays = pd.date_range(start_date, end_date, freq="W-MON")
@@ -30,26 +42,31 @@ def get_weeks_in_range(start_date: str, end_date: str):
     return response
 
 
-def get_articles_and_embeddings(start_date: str, end_date: str):
-    # get articles data
+def get_articles_and_embeddings(
+        start_date: str, end_date: str, batch_size: int = 1000, exclude_article_ids: Set[str] = None,
+):
+    # stream articles data and keep only the merged content of each article instead of the full documents
     articles_repository = get_articles_repository()
-    articles = articles_repository.query(
+    articles_iterator = articles_repository.iter_query(
         q={"parsed_date": {"$gte": start_date, "$lte": end_date}},
-        projection=["_id", "url", "parsed_date", "title", "description", "paragraphs"],
+        projection=["_id", "parsed_date", "title", "description", "paragraphs"],
+        batch_size=batch_size,
     )
+    articles = [
+        {"_id": article["_id"], "parsed_date": article["parsed_date"], "content": extract_article_content(article)}
+        for article in articles_iterator
+        if not exclude_article_ids or article["_id"] not in exclude_article_ids
+    ]
     # get vector ids for articles
     articles_vectors_repository = get_articles_vectors_repository()
     article_ids = [article["_id"] for article in articles]
     articles_vectors_response = articles_vectors_repository.batch_get(article_ids)
     vector_ids = [x["vector_id"] for x in articles_vectors_response]
-    # retrieve embeddings of each article
+    # retrieve embeddings of each article as a single float32 matrix
     article_embeddings_repository = get_article_embeddings_repository()
-    article_embeddings = article_embeddings_repository.get_embeddings(vector_ids)
-    # prepare response as two separate lists:
-    # one containing the articles data and the other containing the article embeddings
+    embeddings, _, article_ids = article_embeddings_repository.get_embeddings_array(vector_ids)
+    # align the articles with the rows of the embeddings matrix
     article_ids_to_idx = {article["_id"]: idx for idx, article in enumerate(articles)}
-    embeddings = [x["embedding"] for x in article_embeddings]
-    article_ids = [x["article_id"] for x in article_embeddings]
     articles = [articles[article_ids_to_idx[article_id]] for article_id in article_ids]
     return articles, embeddings
 
@@ -108,6 +125,112 @@ def batch_add_embeddings(topic_ids: List[str], embeddings: List):
     return topics_vectors_repository.batch_add(topic_ids, vector_ids)
 
 
+def get_topic_model_path(monday: str, sunday: str) -> Path:
+    return TOPIC_MODELS_DIR.joinpath(f"{monday}_{sunday}")
+
+
+def fit_week_topics(monday: str, sunday: str) -> Optional[Dict]:
+    """
+    Fits the topic model of a week and returns the results needed to store its topics.
+    """
+    # extract and preprocess
+    articles, embeddings = get_articles_and_embeddings(monday, sunday)
+    if not articles:
+        return None
+    contents = [article["content"] for article in articles]
+    # calculate topics
+    topic_model = build_topic_model()
+    topics_assignment, assignment_probs = topic_model.fit_transform(
+        documents=contents, embeddings=embeddings,
+    )
+    # the embeddings are computed by the embedding pipeline, so the model is saved without an embedding model
+    topic_model.save(
+        get_topic_model_path(monday, sunday), serialization="safetensors", save_ctfidf=True,
+        save_embedding_model=False,
+    )
+    return {
+        "monday": monday,
+        "sunday": sunday,
+        "article_ids": [article["_id"] for article in articles],
+        "article_dates": [article["parsed_date"] for article in articles],
+        "topic_labels": topic_model.topic_labels_,
+        "topic_assignments": topics_assignment,
+        "assignment_probabilities": list(assignment_probs.astype(float)),
+        "topic_embeddings": {
+            topic_index: topic_model.topic_embeddings_[topic_index].astype(float).tolist()
+            for topic_index in topic_model.topic_labels_
+        },
+    }
+
+
+def store_week_topics(week_topics: Dict):
+    topic_assignments_repository = get_topic_assignments_repository()
+    # ingest topic assignments
+    generated_topic_ids = topic_assignments_repository.batch_add_topic_assignments(
+        article_ids=[ObjectId(article_id) for article_id in week_topics["article_ids"]],
+        article_dates=week_topics["article_dates"],
+        topic_labels=week_topics["topic_labels"],
+        topic_assignments=week_topics["topic_assignments"],
+        assignment_probabilities=week_topics["assignment_probabilities"],
+        topic_start_date=week_topics["monday"],
+        topic_end_date=week_topics["sunday"],
+    )
+    # upsert topic embeddings into the vector db and add mapping from topic id to vector id
+    topic_ids, topic_embeddings = [], []
+    for topic_index, topic_embedding in week_topics["topic_embeddings"].items():
+        topic_ids.append(str(generated_topic_ids[topic_index]))
+        topic_embeddings.append(topic_embedding)
+    batch_add_embeddings(topic_ids=topic_ids, embeddings=topic_embeddings)
+
+
+def assign_week_topics(monday: str, sunday: str) -> int:
+    """
+    Assigns the articles of a fitted week which have no topic yet with the saved model of the week.
+    Returns the number of assigned articles.
+    """
+    topic_assignments_repository = get_topic_assignments_repository()
+    articles, embeddings = get_articles_and_embeddings(
+        monday, sunday, exclude_article_ids=topic_assignments_repository.get_assigned_document_ids(monday, sunday),
+    )
+    if not articles:
+        return 0
+    # without the umap and hdbscan models, `transform` assigns the topic with the most similar topic embedding
+    topic_model = BERTopic.load(str(get_topic_model_path(monday, sunday)))
+    topics_assignment, assignment_similarities = topic_model.transform(
+        documents=[article["content"] for article in articles], embeddings=embeddings,
+    )
+    existing_topic_ids = topic_assignments_repository.get_topic_ids(monday, sunday)
+    generated_topic_ids = topic_assignments_repository.batch_add_topic_assignments(
+        article_ids=[ObjectId(article["_id"]) for article in articles],
+        article_dates=[article["parsed_date"] for article in articles],
+        topic_labels=topic_model.topic_labels_,
+        topic_assignments=[int(topic_index) for topic_index in topics_assignment],
+        # the similarity to the topic embedding is not a membership probability of the clustering
+        assignment_probabilities=[None] * len(articles),
+        topic_start_date=monday,
+        topic_end_date=sunday,
+        topic_ids=existing_topic_ids,
+        assignment_similarities=list(assignment_similarities.astype(float)),
+    )
+    # topics which had no articles before do not have a topic vector yet
+    topic_ids, topic_embeddings = [], []
+    for topic_index, topic_id in generated_topic_ids.items():
+        if topic_index not in existing_topic_ids:
+            topic_ids.append(str(topic_id))
+            topic_embeddings.append(topic_model.topic_embeddings_[topic_index].astype(float).tolist())
+    if topic_ids:
+        batch_add_embeddings(topic_ids=topic_ids, embeddings=topic_embeddings)
+    return len(articles)
+
+
+def limit_worker_threads(num_threads: int):
+    # the variables are inherited by spawned workers and take effect when they load numpy, torch and numba,
+    # threadpoolctl covers the thread pools which are loaded already
+    for env_var in THREAD_LIMIT_ENV_VARS:
+        os.environ[env_var] = str(num_threads)
+    threadpool_limits(limits=num_threads)
+
+
 if __name__ == '__main__':
 
     parser = argparse.ArgumentParser(description="Content ingestion script.")
@@ -119,6 +242,14 @@ if __name__ == '__main__':
         "--end-date", type=parse_date, required=True,
         help="End date in the format YYYY-MM-DD."
     )
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="Number of processes fitting weeks in parallel (default is 1, i.e. sequential)."
+    )
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="Assign the new articles of weeks with existing topics using the saved model of the week."
+    )
     args = parser.parse_args()
 
     logger = get_logger(__name__)
@@ -134,6 +265,8 @@ if __name__ == '__main__':
     logger.info("Initialising script with following parameters:")
     logger.info(f"Start Date: {args.start_date}")
     logger.info(f"End Date: {args.end_date}")
+    logger.info(f"Workers: {args.workers}")
+    logger.info(f"Incremental: {args.incremental}")
     logger.info(50 * "-")
 
     # preparing connections to databases
@@ -143,34 +276,44 @@ if __name__ == '__main__':
     topic_assignments_repository = get_topic_assignments_repository()
 
     # main loop
-    pbar = tqdm(get_weeks_in_range(args.start_date, args.end_date), desc="Calculating topics")
-    logger.info("Process started ...")
-    for monday, sunday in pbar:
+    weeks, fitted_weeks = [], []
+    for monday, sunday in get_weeks_in_range(args.start_date, args.end_date):
         if topic_assignments_repository.check_topics_exist(monday, sunday):
+            if args.incremental and get_topic_model_path(monday, sunday).exists():
+                fitted_weeks.append((monday, sunday))
+                continue
+            if args.incremental:
+                logger.info(f"No saved topic model for {monday} - {sunday}. New articles cannot be assigned.")
             logger.info(f"Skipping topics creation for {monday} - {sunday}. Reason: Topic assignments already exist.")
             continue
-        # extract and preprocess
-        articles, embeddings = get_articles_and_embeddings(monday, sunday)
-        contents = [extract_article_content(article) for article in articles]
-        # calculate topics
-        topic_model = build_topic_model()
-        topics_assignment, assignment_probs = topic_model.fit_transform(
-            documents=contents, embeddings=np.array(embeddings),
-        )
-        # ingest topic assignments
-        generated_topic_ids = topic_assignments_repository.batch_add_topic_assignments(
-            article_ids=[ObjectId(article["_id"]) for article in articles],
-            article_dates=[article["parsed_date"] for article in articles],
-            topic_labels=topic_model.topic_labels_,
-            topic_assignments=topics_assignment,
-            assignment_probabilities=list(assignment_probs.astype(float)),
-            topic_start_date=monday,
-            topic_end_date=sunday,
-        )
-        # upsert topic embeddings into the vector db and add mapping from topic id to vector id
-        topic_ids, topic_embeddings = [], []
-        for topic_index in topic_model.topic_labels_:
-            topic_ids.append(str(generated_topic_ids[topic_index]))
-            topic_embeddings.append(topic_model.topic_embeddings_[topic_index].astype(float).tolist())
-        batch_add_embeddings(topic_ids=topic_ids, embeddings=topic_embeddings)
+        weeks.append((monday, sunday))
+
+    logger.info("Process started ...")
+    for monday, sunday in tqdm(fitted_weeks, desc="Assigning new articles"):
+        num_assigned = assign_week_topics(monday, sunday)
+        logger.info(f"Assigned {num_assigned} new articles to the topics of {monday} - {sunday}.")
+    if args.workers <= 1:
+        for monday, sunday in tqdm(weeks, desc="Calculating topics"):
+            if (week_topics := fit_week_topics(monday, sunday)) is None:
+                logger.info(f"No articles found for {monday} - {sunday}.")
+                continue
+            store_week_topics(week_topics)
+    else:
+        # the weeks are fitted in parallel, while the results are written one by one by this process
+        threads_per_worker = max(1, (os.cpu_count() or 1) // args.workers)
+        logger.info(f"Fitting {len(weeks)} weeks with {args.workers} workers, {threads_per_worker} threads each ...")
+        limit_worker_threads(threads_per_worker)
+        with ProcessPoolExecutor(
+                max_workers=args.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=limit_worker_threads,
+                initargs=(threads_per_worker,),
+        ) as executor:
+            futures = {executor.submit(fit_week_topics, monday, sunday): (monday, sunday) for monday, sunday in weeks}
+            for future in tqdm(as_completed(futures), total=len(futures), desc="Calculating topics"):
+                monday, sunday = futures[future]
+                if (week_topics := future.result()) is None:
+                    logger.info(f"No articles found for {monday} - {sunday}.")
+                    continue
+                store_week_topics(week_topics)
     logger.info("Process finished successfully!")
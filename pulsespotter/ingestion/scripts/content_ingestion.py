@@ -1,7 +1,18 @@
 import argparse
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 from copy import deepcopy
 from datetime import datetime
+from typing import List, Dict
+
+from pymongo.errors import OperationFailure
+
+from pulsespotter.db.repositories.articles import ArticlesRepository
 from pulsespotter.ingestion.scrape_configs import SCRAPE_CONFIGS
+from pulsespotter.ingestion.scrapers.base import RESPONSE_CACHE_DIR
+from pulsespotter.ingestion.utils.request_budget import RequestBudget, RequestBudgetExhausted
+from pulsespotter.ingestion.utils.response_cache import ResponseCache
 from pulsespotter.config import *
 
 from pulsespotter.utils.logging_utils import get_logger
@@ -14,16 +25,104 @@ def parse_input_date(input_date: str):
         raise argparse.ArgumentTypeError(f"Invalid date: '{input_date}'. Must be in format YYYY-MM-DD.")
 
 
-def build_scraper(scraper_params: dict):
+def parse_site_names(value: str) -> List[str]:
+    if value == "all":
+        return [site_name for site_name, params in SCRAPE_CONFIGS.items() if params.get("enabled", False)]
+    site_names = [site_name.strip() for site_name in value.split(",") if site_name.strip()]
+    unknown_site_names = [site_name for site_name in site_names if site_name not in SCRAPE_CONFIGS]
+    if unknown_site_names or not site_names:
+        raise argparse.ArgumentTypeError(
+            f"Invalid sites: '{value}'. Must be 'all' or a comma separated list of {list(SCRAPE_CONFIGS)}."
+        )
+    return site_names
+
+
+def build_scraper(scraper_params: dict, **overrides):
     scraper_params_ = deepcopy(scraper_params)
     scraper_class = scraper_params_.pop("scraper_class", None)
     if not scraper_class:
         return None
     params_cls = scraper_class.config_schema()
-    params = params_cls(**scraper_params_)
+    params = params_cls(**{**scraper_params_, **overrides})
     return scraper_class(params)
 
 
+def crawl_site(
+        site_name: str,
+        start_date: datetime,
+        end_date: datetime,
+        page_limit: int,
+        concurrent: bool = False,
+        request_budget: RequestBudget = None,
+        max_concurrent_requests: int = None,
+        response_cache: ResponseCache = None,
+) -> Dict:
+    logger = logging.getLogger(__name__)
+    summary = {
+        "site_name": site_name, "status": "finished", "pages": 0, "articles": 0, "requests": 0, "cached": 0,
+        "seconds": 0.0,
+    }
+    scraper_params = SCRAPE_CONFIGS[site_name]
+    if not scraper_params.get("enabled", False):
+        logger.info(f"Site {site_name} is disabled through configurations or is not supported.")
+        summary["status"] = "disabled"
+        return summary
+
+    overrides = {"max_concurrent_requests": max_concurrent_requests} if max_concurrent_requests else {}
+    scraper = None
+    start = time.perf_counter()
+    try:
+        # e.g. invalid xpaths in the scrape configs fail here and are reported as this site's failure
+        scraper = build_scraper(scraper_params, **overrides)
+        if not scraper:
+            logger.info(f"Missing `scraper_class` from {site_name} scrape configs.")
+            summary["status"] = "not configured"
+            return summary
+        scraper.request_budget = request_budget
+        scraper.response_cache = response_cache
+        scraper.warm_url_filter()
+        if concurrent and hasattr(scraper, "run_between_concurrently"):
+            scraper.run_between_concurrently(start_date, end_date, page_limit)
+        else:
+            if concurrent:
+                logger.info(f"Concurrent mode is not supported for {site_name}. Running sequentially ...")
+            scraper.run_between(start_date, end_date, page_limit)
+    except RequestBudgetExhausted as e:
+        logger.warning(f"Stopping {site_name}: {e}")
+        summary["status"] = "budget exhausted"
+    except Exception as e:
+        logger.exception(f"Crawling {site_name} failed: {e}")
+        summary["status"] = "failed"
+    finally:
+        # writes the buffered articles and persists the url filter, also when the crawl failed
+        if scraper:
+            try:
+                scraper.close()
+            except Exception as e:
+                logger.exception(f"Closing the scraper of {site_name} failed: {e}")
+                summary["status"] = "failed"
+    summary["seconds"] = time.perf_counter() - start
+    if scraper:
+        summary.update(
+            pages=scraper.stats.pages,
+            articles=scraper.stats.articles,
+            requests=scraper.stats.requests,
+            cached=scraper.stats.cached_responses,
+        )
+    return summary
+
+
+def format_summary(summaries: List[Dict]) -> List[str]:
+    header = f"{'site':<16} {'status':<17} {'pages':>7} {'articles':>9} {'requests':>9} {'cached':>7} {'time (s)':>9}"
+    lines = [header, len(header) * "-"]
+    for summary in summaries:
+        lines.append(
+            f"{summary['site_name']:<16} {summary['status']:<17} {summary['pages']:>7} {summary['articles']:>9} "
+            f"{summary['requests']:>9} {summary['cached']:>7} {summary['seconds']:>9.1f}"
+        )
+    return lines
+
+
 if __name__ == '__main__':
 
     parser = argparse.ArgumentParser(description="Content ingestion script.")
@@ -33,12 +132,39 @@ if __name__ == '__main__':
     parser.add_argument(
         "--end-date", type=parse_input_date, required=True, help="End date in the format YYYY-MM-DD."
     )
-    parser.add_argument(
-        "--site-name", type=str, required=True, help="Name of the site."
+    site_group = parser.add_mutually_exclusive_group(required=True)
+    site_group.add_argument(
+        "--site-name", type=str, choices=list(SCRAPE_CONFIGS), help="Name of the site."
+    )
+    site_group.add_argument(
+        "--sites", type=parse_site_names,
+        help="'all' for every enabled site or a comma separated list of site names, crawled in parallel."
     )
     parser.add_argument(
         "--page-limit", type=int, default=15, help="Limit of pages to process (default is 15)."
     )
+    parser.add_argument(
+        "--concurrent", action="store_true",
+        help="Fetch articles concurrently (only supported by archive scrapers)."
+    )
+    parser.add_argument(
+        "--max-workers", type=int, default=None,
+        help="Maximum number of sites crawled at the same time (default is all of them)."
+    )
+    parser.add_argument(
+        "--max-concurrent-requests", type=int, default=None,
+        help="Maximum in-flight requests per site in concurrent mode (default is the value of the site configs)."
+    )
+    parser.add_argument(
+        "--request-budget", type=int, default=None,
+        help="Maximum number of requests sent to ZenRows by all sites together (default is unlimited)."
+    )
+    parser.add_argument(
+        "--response-cache", action="store_true",
+        help="Serve article pages from the local response cache and store every fetched article page in it, "
+             "e.g. while developing scrape patterns or to re-parse articles later. "
+             "Listing pages are always fetched."
+    )
     args = parser.parse_args()
 
     logger = get_logger(__name__)
@@ -50,23 +176,58 @@ if __name__ == '__main__':
     logger.info(f"{ZENROWS_API_KEY=}")
     logger.info(50 * "-")
 
+    site_names = [args.site_name] if args.site_name else args.sites
     logger.info("Initialising script with following parameters:")
     logger.info(f"Start Date: {args.start_date}")
     logger.info(f"End Date: {args.end_date}")
-    logger.info(f"Site Name: {args.site_name}")
+    logger.info(f"Site Names: {site_names}")
     logger.info(f"Page Limit: {args.page_limit}")
+    logger.info(f"Concurrent: {args.concurrent}")
+    logger.info(f"Max Workers: {args.max_workers}")
+    logger.info(f"Max Concurrent Requests: {args.max_concurrent_requests}")
+    logger.info(f"Request Budget: {args.request_budget}")
+    logger.info(f"Response Cache: {args.response_cache}")
     logger.info(50 * "-")
 
-    scraper_params = SCRAPE_CONFIGS.get(args.site_name)
-    if not scraper_params.get("enabled", False):
-        logger.info(f"Site {args.site_name} is disabled through configurations or is not supported.")
+    if not site_names:
+        logger.info("No enabled sites to crawl.")
         exit()
 
-    scraper = build_scraper(scraper_params)
-    if not scraper:
-        logger.info(f"Missing `scraper_class` from {args.site_name} scrape configs.")
-        exit()
+    try:
+        ArticlesRepository().ensure_indexes()
+    except OperationFailure as e:
+        # e.g. the collection still contains duplicate urls from before the index existed
+        logger.warning(f"Could not create the unique index on article urls: {e}")
+
+    request_budget = RequestBudget(args.request_budget) if args.request_budget is not None else None
+    response_cache = ResponseCache(RESPONSE_CACHE_DIR) if args.response_cache else None
 
     logger.info("Process started ...")
-    scraper.run_between(args.start_date, args.end_date, args.page_limit)
+    try:
+        # the scrapers are bound by network latency, so every site runs in its own thread
+        with ThreadPoolExecutor(max_workers=args.max_workers or len(site_names)) as executor:
+            futures = [
+                executor.submit(
+                    crawl_site,
+                    site_name,
+                    args.start_date,
+                    args.end_date,
+                    args.page_limit,
+                    concurrent=args.concurrent,
+                    request_budget=request_budget,
+                    max_concurrent_requests=args.max_concurrent_requests,
+                    response_cache=response_cache,
+                )
+                for site_name in site_names
+            ]
+            summaries = [future.result() for future in futures]
+    finally:
+        if response_cache is not None:
+            response_cache.close()
+
+    for line in format_summary(summaries):
+        logger.info(line)
+    if any(summary["status"] == "failed" for summary in summaries):
+        logger.error("Process finished with failures.")
+        exit(1)
     logger.info("Process finished successfully!")
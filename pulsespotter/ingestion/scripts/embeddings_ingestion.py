@@ -1,21 +1,24 @@
 import argparse
-import re
+from functools import partial
+from itertools import islice
 from typing import List
 
 import nltk
-import torch
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
+from more_itertools import chunked
 from qdrant_client.http.models import Distance
-from sentence_transformers import SentenceTransformer
 from tqdm import tqdm
 
 from pulsespotter.config import *
 from pulsespotter.db.dao import get_article_embeddings_repository
 from pulsespotter.db.dao import get_articles_repository
 from pulsespotter.db.dao import get_articles_vectors_repository
-from pulsespotter.ingestion.utils.common import generate_batches, join_strings
+from pulsespotter.ingestion.utils.embedding_backends import EMBEDDING_BACKENDS
+from pulsespotter.ingestion.utils.embedding_backends import load_embedding_model, check_backend_agreement
+from pulsespotter.ingestion.utils.embedding_cache import EmbeddingCache
+from pulsespotter.ingestion.utils.encoding import LengthBucketedEncoder
 from pulsespotter.ingestion.utils.parse_functions import parse_date
+from pulsespotter.ingestion.utils.pipeline import Pipeline, format_stage_stats
+from pulsespotter.ingestion.utils.preprocessing import PreprocessingEngine
 from pulsespotter.utils.logging_utils import get_logger
 
 
@@ -26,19 +29,20 @@ def load_nltk_files():
     nltk.download('wordnet')
 
 
-def load_model():
-    model = SentenceTransformer("sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2", device="cpu")
-    model.eval()
-    return model
+EMBEDDING_MODEL_NAME = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
 
 
-def get_articles(start_date: str = None, end_date: str = None):
+def load_model(backend: str = "torch", quantization_config: str = "avx2"):
+    return load_embedding_model(EMBEDDING_MODEL_NAME, backend=backend, quantization_config=quantization_config)
+
+
+def get_articles_query(start_date: str = None, end_date: str = None) -> dict:
     date_filters = {"$exists": True, "$ne": None}
     if start_date:
         date_filters["$gte"] = start_date
     if end_date:
         date_filters["$lte"] = end_date
-    q = {
+    return {
         "$and": [
             {
                 "visited": True,
@@ -54,47 +58,51 @@ def get_articles(start_date: str = None, end_date: str = None):
             }
         ]
     }
+
+
+def count_articles(start_date: str = None, end_date: str = None) -> int:
     articles_repository = get_articles_repository()
-    response = articles_repository.query(q=q)
-    return response
+    return articles_repository.count(get_articles_query(start_date, end_date))
+
+
+def get_articles(start_date: str = None, end_date: str = None, batch_size: int = None):
+    articles_repository = get_articles_repository()
+    return articles_repository.iter_query(
+        q=get_articles_query(start_date, end_date),
+        projection=["_id", "title", "description", "paragraphs"],
+        batch_size=batch_size,
+    )
 
 
 def get_articles_without_embeddings(article_ids: list):
-    # get vector ids for passed article ids
+    # get the article ids which already have a vector id with a single query
     articles_vectors_repository = get_articles_vectors_repository()
-    vector_ids = []
-    for article_id in article_ids:
-        article_vector_response = articles_vectors_repository.get(article_id)
-        vector_ids.append((article_vector_response or {}).get("vector_id"))
-    # return article ids for which the retrieved vector id is None
-    response = []
-    for i in range(len(vector_ids)):
-        if vector_ids[i] is None:
-            response.append(article_ids[i])
-    return response
-
-
-def preprocess_document(text):
-    text = text.lower()
-    text = re.sub(r'[^\w\s]', ' ', text)
-    words = word_tokenize(text, language='german')
-    words = [word for word in words if word not in stop_words]
-    return ' '.join(words)
-
-
-def create_document_for_record(record):
-    title = join_strings(record.get("title") or []) or None
-    description = join_strings(record.get("description") or []) or None
-    paragraphs = join_strings(record.get("paragraphs") or []) or None
-    document = " ".join([x.strip() for x in [title, description, paragraphs] if x is not None])
-    return preprocess_document(document)
-
-
-@torch.no_grad()
+    articles_vectors = articles_vectors_repository.batch_get(article_ids, projection=["_id", "vector_id"])
+    # mappings without a vector id count as missing, so that the article is embedded again
+    embedded_article_ids = {record["_id"] for record in articles_vectors if record.get("vector_id")}
+    # return article ids which are not mapped to a vector id
+    return [article_id for article_id in article_ids if article_id not in embedded_article_ids]
+
+
 def batch_embed_documents(documents: list, model):
+    # `encode` already runs the forward passes without gradient tracking
     return model.encode(documents).tolist()
 
 
+def batch_embed_documents_cached(documents: list, model, embedding_cache: EmbeddingCache = None):
+    if embedding_cache is None:
+        return batch_embed_documents(documents, model)
+    embeddings = embedding_cache.get_many(documents)
+    # encode each missing document only once, even if it is repeated within the batch
+    missing_documents = list(dict.fromkeys(doc for doc, emb in zip(documents, embeddings) if emb is None))
+    if missing_documents:
+        missing_embeddings = batch_embed_documents(missing_documents, model)
+        embedding_cache.put_many(missing_documents, missing_embeddings)
+        missing_embeddings = dict(zip(missing_documents, missing_embeddings))
+        embeddings = [emb if emb is not None else missing_embeddings[doc] for doc, emb in zip(documents, embeddings)]
+    return embeddings
+
+
 def batch_add_embeddings(article_ids: List[str], embeddings: List):
     article_embeddings_repository = get_article_embeddings_repository()
     articles_vectors_repository = get_articles_vectors_repository()
@@ -106,6 +114,29 @@ def batch_add_embeddings(article_ids: List[str], embeddings: List):
     return articles_vectors_repository.batch_add(article_ids, vector_ids)
 
 
+# pipeline stages
+def filter_embedded_articles(batch: list):
+    article_ids_without_embeddings = set(get_articles_without_embeddings([doc["_id"] for doc in batch]))
+    effective_batch = [doc for doc in batch if doc["_id"] in article_ids_without_embeddings]
+    return effective_batch or None
+
+
+def preprocess_batch(batch: list, preprocessing_engine: PreprocessingEngine):
+    documents = preprocessing_engine.create_documents(batch)
+    return [(record["_id"], document) for record, document in zip(batch, documents)]
+
+
+def embed_batch(batch: list, model, embedding_cache: EmbeddingCache = None):
+    article_ids, documents = zip(*batch)
+    return list(zip(article_ids, batch_embed_documents_cached(list(documents), model, embedding_cache)))
+
+
+def write_batch(batch: list):
+    article_ids, embeddings = zip(*batch)
+    batch_add_embeddings(article_ids=list(article_ids), embeddings=list(embeddings))
+    return batch
+
+
 if __name__ == '__main__':
 
     parser = argparse.ArgumentParser(description="Content ingestion script.")
@@ -118,9 +149,57 @@ if __name__ == '__main__':
         help="End date in the format YYYY-MM-DD."
     )
     parser.add_argument(
-        "--batch-size", type=int, default=16,
+        "--batch-size", type=int, default=256,
         help="Number of articles to process as part of a single batch."
     )
+    parser.add_argument(
+        "--queue-size", type=int, default=4,
+        help="Maximum number of batches waiting between two pipeline stages."
+    )
+    parser.add_argument(
+        "--preprocess-workers", type=int, default=1,
+        help="Number of processes preprocessing documents."
+    )
+    parser.add_argument(
+        "--preprocess-chunk-size", type=int, default=8,
+        help="Number of documents sent to a preprocessing process at once."
+    )
+    parser.add_argument(
+        "--writer-workers", type=int, default=2,
+        help="Number of workers writing embeddings into the databases."
+    )
+    parser.add_argument(
+        "--embedding-backend", type=str, choices=EMBEDDING_BACKENDS, default="torch",
+        help="Backend running the embedding model."
+    )
+    parser.add_argument(
+        "--quantization-config", type=str, choices=["arm64", "avx2", "avx512", "avx512_vnni"], default="avx2",
+        help="ONNX Runtime quantization configuration used by the `onnx-int8` backend."
+    )
+    parser.add_argument(
+        "--backend-agreement-samples", type=int, default=64,
+        help="Number of articles used to compare a non-torch backend against the torch model (0 to skip)."
+    )
+    parser.add_argument(
+        "--min-backend-agreement", type=float, default=0.95,
+        help="Minimum cosine similarity to the torch embeddings required for every sampled article."
+    )
+    parser.add_argument(
+        "--max-batch-tokens", type=int, default=8192,
+        help="Maximum number of (padded) tokens per encoding batch."
+    )
+    parser.add_argument(
+        "--max-encoding-batch-size", type=int, default=64,
+        help="Maximum number of documents per encoding batch."
+    )
+    parser.add_argument(
+        "--embedding-cache-path", type=str, default=str(RESOURCES_DIR.joinpath("embedding_cache.sqlite")),
+        help="Path of the SQLite file caching embeddings by document content hash."
+    )
+    parser.add_argument(
+        "--disable-embedding-cache", action="store_true",
+        help="Encode every document, without consulting the embedding cache."
+    )
     args = parser.parse_args()
 
     logger = get_logger(__name__)
@@ -137,6 +216,14 @@ if __name__ == '__main__':
     logger.info(f"Start Date: {args.start_date}")
     logger.info(f"End Date: {args.end_date}")
     logger.info(f"Batch Size: {args.batch_size}")
+    logger.info(f"Queue Size: {args.queue_size}")
+    logger.info(f"Preprocess Workers: {args.preprocess_workers}")
+    logger.info(f"Preprocess Chunk Size: {args.preprocess_chunk_size}")
+    logger.info(f"Writer Workers: {args.writer_workers}")
+    logger.info(f"Embedding Backend: {args.embedding_backend}")
+    logger.info(f"Max Batch Tokens: {args.max_batch_tokens}")
+    logger.info(f"Max Encoding Batch Size: {args.max_encoding_batch_size}")
+    logger.info(f"Embedding Cache: {None if args.disable_embedding_cache else args.embedding_cache_path}")
     logger.info(50 * "-")
 
     # creating vector db collection if not exists
@@ -146,25 +233,73 @@ if __name__ == '__main__':
 
     logger.info("Loading utility files for document preprocessing ...")
     load_nltk_files()
-    stop_words = set(stopwords.words("german"))
+    preprocessing_engine = PreprocessingEngine(
+        num_workers=args.preprocess_workers, chunk_size=args.preprocess_chunk_size,
+    )
 
     logger.info("Initialising embedding model ...")
-    model = load_model()
+    model = load_model(backend=args.embedding_backend, quantization_config=args.quantization_config)
+    if args.embedding_backend != "torch" and args.backend_agreement_samples > 0:
+        logger.info("Checking agreement of the embedding backend with the torch model ...")
+        sample_articles = list(islice(
+            get_articles(start_date=args.start_date, end_date=args.end_date), args.backend_agreement_samples,
+        ))
+        if not sample_articles:
+            logger.info("No articles to compare the embedding backend with. Skipping the agreement check ...")
+        else:
+            agreement = check_backend_agreement(
+                reference_model=load_model(backend="torch"),
+                model=model,
+                documents=preprocessing_engine.create_documents(sample_articles),
+            )
+            logger.info(
+                f"Cosine similarity to torch embeddings: mean={agreement['mean']:.4f}, min={agreement['min']:.4f}"
+            )
+            if agreement["min"] < args.min_backend_agreement:
+                raise ValueError(
+                    f"Embeddings of the '{args.embedding_backend}' backend diverge from the torch model "
+                    f"(min cosine similarity {agreement['min']:.4f} < {args.min_backend_agreement})."
+                )
+    encoder = LengthBucketedEncoder(
+        model, max_tokens=args.max_batch_tokens, max_batch_size=args.max_encoding_batch_size,
+    )
+    embedding_cache = None
+    if not args.disable_embedding_cache:
+        # vectors of different backends (and int8 quantizations) are close but not identical, so they are cached
+        # separately
+        cache_model_name = f"{EMBEDDING_MODEL_NAME}:{args.embedding_backend}"
+        if args.embedding_backend == "onnx-int8":
+            cache_model_name = f"{cache_model_name}:{args.quantization_config}"
+        embedding_cache = EmbeddingCache(args.embedding_cache_path, model_name=cache_model_name)
 
     logger.info("Retrieving articles ...")
-    articles = list(get_articles(start_date=args.start_date, end_date=args.end_date))
-    num_articles = len(articles)
+    num_articles = count_articles(start_date=args.start_date, end_date=args.end_date)
+    articles = get_articles(start_date=args.start_date, end_date=args.end_date, batch_size=args.batch_size)
     num_steps = num_articles // args.batch_size + int(num_articles % args.batch_size > 0)
     pbar = tqdm(total=num_steps)
 
-    logger.info("Process started ...")
-    for batch in generate_batches(articles, args.batch_size):
-        batch_article_ids = [doc["_id"] for doc in batch]
-        article_ids_without_embeddings = get_articles_without_embeddings(batch_article_ids)
-        if len(article_ids_without_embeddings) != 0:
-            effective_batch = [doc for doc in batch if doc["_id"] in set(article_ids_without_embeddings)]
-            documents = [create_document_for_record(record) for record in effective_batch]
-            embeddings = batch_embed_documents(documents, model)
-            batch_add_embeddings(article_ids=article_ids_without_embeddings, embeddings=embeddings)
+    def filter_stage(batch: list):
         pbar.update()
+        return filter_embedded_articles(batch)
+
+    # fetch -> filter -> preprocess -> encode -> write, with bounded queues between the stages
+    pipeline = Pipeline(queue_size=args.queue_size)
+    pipeline.add_stage("filter", filter_stage)
+    # a single thread dispatches the batches, the engine parallelizes each one over its process pool
+    pipeline.add_stage("preprocess", partial(preprocess_batch, preprocessing_engine=preprocessing_engine))
+    pipeline.add_stage("encode", partial(embed_batch, model=encoder, embedding_cache=embedding_cache))
+    pipeline.add_stage("write", write_batch, num_workers=args.writer_workers)
+
+    logger.info("Process started ...")
+    with preprocessing_engine:
+        stages_stats = pipeline.run(chunked(articles, args.batch_size))
+    pbar.close()
+    for line in format_stage_stats(stages_stats):
+        logger.info(line)
+    if embedding_cache is not None:
+        logger.info(
+            f"Embedding cache: {embedding_cache.hits} hits, {embedding_cache.misses} misses "
+            f"(hit rate: {embedding_cache.hit_rate:.1%})"
+        )
+        embedding_cache.close()
     logger.info("Process finished successfully!")
@@ -0,0 +1,114 @@
+import argparse
+import multiprocessing
+import os
+from copy import deepcopy
+from typing import Dict, List, Tuple, Optional
+
+from more_itertools import chunked
+from tqdm import tqdm
+
+from pulsespotter.config import *
+from pulsespotter.db.repositories.articles import ArticlesRepository
+from pulsespotter.ingestion.scrape_configs import SCRAPE_CONFIGS
+from pulsespotter.ingestion.scrapers.base import RESPONSE_CACHE_DIR
+from pulsespotter.ingestion.utils.data_models import NewsScraperParams
+from pulsespotter.ingestion.utils.parse_functions import parse_date
+from pulsespotter.ingestion.utils.parse_utils import parse_website, compile_scrape_patterns
+from pulsespotter.ingestion.utils.response_cache import ResponseCache
+from pulsespotter.utils.logging_utils import get_logger
+
+# state of the worker processes, set up by `init_worker`
+_worker_state = {}
+
+
+def load_scraper_params(site_name: str) -> NewsScraperParams:
+    scraper_params = deepcopy(SCRAPE_CONFIGS[site_name])
+    scraper_class = scraper_params.pop("scraper_class")
+    return scraper_class.config_schema()(**scraper_params)
+
+
+def init_worker(site_name: str, fields: List[str] = None):
+    params = load_scraper_params(site_name)
+    scrape_patterns = params.scrape_patterns
+    if fields:
+        scrape_patterns = {field: pattern for field, pattern in scrape_patterns.items() if field in fields}
+    _worker_state.update(
+        scrape_patterns=scrape_patterns,
+        scrape_xpaths=compile_scrape_patterns(scrape_patterns),
+        request_params=params.scraper_request_params.model_dump(exclude_unset=True),
+        # archive scrapers fall back to the date of the archive page, which is not known when re-parsing
+        keep_missing_dates=getattr(params, "overwrite_date_if_not_exists", False),
+        response_cache=ResponseCache(RESPONSE_CACHE_DIR),
+    )
+
+
+def reparse_article(article: Dict) -> Tuple[str, Optional[Dict]]:
+    page_source = _worker_state["response_cache"].get(article["url"], _worker_state["request_params"])
+    if page_source is None:
+        return article["_id"], None
+    updates = parse_website(page_source, _worker_state["scrape_patterns"], _worker_state["scrape_xpaths"])
+    if updates.get("raw_date") and not updates.get("parsed_date") and "parsed_date" in updates:
+        updates["parsed_date"] = parse_date(updates["raw_date"])
+    if _worker_state["keep_missing_dates"]:
+        for field in ("raw_date", "parsed_date"):
+            if field in updates and updates[field] is None:
+                updates.pop(field)
+    return article["_id"], updates
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(
+        description="Re-parses the cached pages of a site's articles with its current scrape patterns."
+    )
+    parser.add_argument(
+        "--site-name", type=str, choices=list(SCRAPE_CONFIGS), required=True, help="Name of the site."
+    )
+    parser.add_argument(
+        "--fields", type=str, nargs="+", default=None,
+        help="Scrape pattern fields to update (default is all fields of the site's scrape patterns)."
+    )
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count(), help="Number of parsing processes (default is CPU count)."
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=500, help="Number of articles updated per bulk write (default is 500)."
+    )
+    args = parser.parse_args()
+    scrape_fields = list(load_scraper_params(args.site_name).scrape_patterns)
+    if args.fields and (unknown_fields := set(args.fields) - set(scrape_fields)):
+        parser.error(f"Unknown fields {sorted(unknown_fields)}. Must be some of {scrape_fields}.")
+
+    logger = get_logger(__name__)
+    logger.info("Environment vars:")
+    logger.info(f"{PROJECT_DIR=}")
+    logger.info(f"{MONGO_HOST=}")
+    logger.info(f"{MONGO_DATABASE=}")
+    logger.info(50 * "-")
+
+    logger.info("Initialising script with following parameters:")
+    logger.info(f"Site Name: {args.site_name}")
+    logger.info(f"Fields: {args.fields}")
+    logger.info(f"Workers: {args.workers}")
+    logger.info(f"Batch Size: {args.batch_size}")
+    logger.info(50 * "-")
+
+    articles_repository = ArticlesRepository()
+    num_articles = articles_repository.count({"site_name": args.site_name})
+    logger.info(f"Re-parsing {num_articles} articles of {args.site_name} from {RESPONSE_CACHE_DIR} ...")
+
+    num_missing = 0
+    num_modified = 0
+    context = multiprocessing.get_context("forkserver")
+    with context.Pool(args.workers, initializer=init_worker, initargs=(args.site_name, args.fields)) as pool:
+        results = pool.imap_unordered(
+            reparse_article, articles_repository.iter_site_urls(args.site_name), chunksize=64,
+        )
+        for batch in chunked(tqdm(results, total=num_articles, desc="Re-parsing articles"), args.batch_size):
+            updates = [(article_id, fields) for article_id, fields in batch if fields]
+            num_missing += len(batch) - len(updates)
+            num_modified += articles_repository.bulk_update_articles(updates)
+
+    logger.info(f"Articles without cached page: {num_missing}")
+    logger.info(f"Modified articles: {num_modified}")
+    logger.info("Process finished successfully!")
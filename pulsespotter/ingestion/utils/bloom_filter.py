@@ -0,0 +1,78 @@
+import hashlib
+import json
+import math
+from pathlib import Path
+from typing import Iterable
+
+
+class BloomFilter:
+    """
+    Compact probabilistic set: `item in bloom_filter` is never False for an added item, and is True for an item
+    which was not added with a probability of about `error_rate` as long as no more than `capacity` items are added.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        if capacity <= 0 or not 0 < error_rate < 1:
+            raise ValueError("Capacity must be a positive integer and error rate must be between 0 and 1.")
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, item: str):
+        # double hashing: the i-th position is h1 + i * h2
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def add(self, item: str):
+        is_new = False
+        for position in self._positions(item):
+            mask = 1 << (position & 7)
+            if not self._bits[position >> 3] & mask:
+                self._bits[position >> 3] |= mask
+                is_new = True
+        # items which were (probably) added before do not count against the capacity
+        if is_new:
+            self.count += 1
+
+    def update(self, items: Iterable[str]):
+        for item in items:
+            self.add(item)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    @property
+    def is_saturated(self) -> bool:
+        return self.count > self.capacity
+
+    def save(self, path: Path | str, metadata: dict = None):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        header = {
+            "capacity": self.capacity,
+            "error_rate": self.error_rate,
+            "count": self.count,
+            "metadata": metadata or {},
+        }
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(json.dumps(header).encode("utf-8") + b"\n")
+            f.write(self._bits)
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path: Path | str):
+        with open(path, "rb") as f:
+            header = json.loads(f.readline())
+            bloom_filter = cls(capacity=header["capacity"], error_rate=header["error_rate"])
+            bits = f.read()
+        if len(bits) != len(bloom_filter._bits):
+            raise ValueError(f"Corrupted bloom filter file: {path}")
+        bloom_filter._bits = bytearray(bits)
+        bloom_filter.count = header["count"]
+        return bloom_filter, header["metadata"]
@@ -0,0 +1,123 @@
+import sqlite3
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+
+class CrawlFrontier:
+    """
+    Persistent queue of the listing pages of a crawl job.
+
+    Pending pages are kept in crawl order together with the last evaluated date and the start url they were
+    reached from, and completed pages are recorded as visited. A job which is opened again after a crash
+    continues with its pending pages instead of fetching the visited ones again. The state of a job is
+    removed once it finished, and the state of abandoned jobs, which were not updated for `max_age_days`,
+    is removed when the frontier is opened.
+    """
+
+    def __init__(self, path: Path | str, job: str, max_age_days: float = 30):
+        self._job = job
+        if str(path) != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(str(path))
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS pending ("
+                "job TEXT NOT NULL, url TEXT NOT NULL, position INTEGER NOT NULL, date TEXT, "
+                "start_url TEXT NOT NULL, PRIMARY KEY (job, url))"
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS visited ("
+                "job TEXT NOT NULL, url TEXT NOT NULL, date TEXT, start_url TEXT NOT NULL, "
+                "PRIMARY KEY (job, url))"
+            )
+            self._connection.execute("CREATE TABLE IF NOT EXISTS jobs (job TEXT PRIMARY KEY, updated_at REAL NOT NULL)")
+        self._prune(max_age_days)
+
+    def _prune(self, max_age_days: float):
+        expired_jobs = "SELECT job FROM jobs WHERE updated_at < ?"
+        with self._connection:
+            cutoff = time.time() - max_age_days * 24 * 3600
+            self._connection.execute(f"DELETE FROM pending WHERE job IN ({expired_jobs})", (cutoff,))
+            self._connection.execute(f"DELETE FROM visited WHERE job IN ({expired_jobs})", (cutoff,))
+            self._connection.execute("DELETE FROM jobs WHERE updated_at < ?", (cutoff,))
+
+    def _touch(self):
+        self._connection.execute(
+            "INSERT OR REPLACE INTO jobs (job, updated_at) VALUES (?, ?)", (self._job, time.time()),
+        )
+
+    def _count(self, table: str) -> int:
+        return self._connection.execute(f"SELECT COUNT(*) FROM {table} WHERE job = ?", (self._job,)).fetchone()[0]
+
+    @property
+    def num_pending(self) -> int:
+        return self._count("pending")
+
+    @property
+    def num_visited(self) -> int:
+        return self._count("visited")
+
+    def start(self, start_urls: List[Tuple[str, str]]) -> bool:
+        """
+        Enqueues the given `(date, url)` start urls, unless the job has a saved state.
+        Returns whether the job is resumed.
+        """
+        if self.num_pending > 0 or self.num_visited > 0:
+            return True
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO pending (job, url, position, date, start_url) VALUES (?, ?, ?, ?, ?)",
+                [(self._job, url, position, date, url) for position, (date, url) in enumerate(start_urls)],
+            )
+            self._touch()
+        return False
+
+    def next_pending(self) -> Optional[Tuple[str, str, str]]:
+        """
+        Returns the `(date, url, start_url)` of the next page to crawl. The page stays pending until it is completed.
+        """
+        return self._connection.execute(
+            "SELECT date, url, start_url FROM pending WHERE job = ? ORDER BY position LIMIT 1", (self._job,),
+        ).fetchone()
+
+    def is_visited(self, url: str) -> bool:
+        row = self._connection.execute("SELECT 1 FROM visited WHERE job = ? AND url = ?", (self._job, url))
+        return row.fetchone() is not None
+
+    def complete(self, url: str, last_evaluated_date: str, next_url: str = None):
+        """
+        Marks the page as visited and puts the next page, if any, at the front of the queue.
+        """
+        row = self._connection.execute(
+            "SELECT start_url FROM pending WHERE job = ? AND url = ?", (self._job, url),
+        ).fetchone()
+        start_url = row[0] if row else url
+        with self._connection:
+            self._connection.execute("DELETE FROM pending WHERE job = ? AND url = ?", (self._job, url))
+            self._connection.execute(
+                "INSERT OR REPLACE INTO visited (job, url, date, start_url) VALUES (?, ?, ?, ?)",
+                (self._job, url, last_evaluated_date, start_url),
+            )
+            if next_url is not None and not self.is_visited(next_url):
+                self._connection.execute(
+                    "INSERT OR IGNORE INTO pending (job, url, position, date, start_url) "
+                    "SELECT ?, ?, COALESCE(MIN(position), 0) - 1, ?, ? FROM pending WHERE job = ?",
+                    (self._job, next_url, last_evaluated_date, start_url, self._job),
+                )
+            self._touch()
+
+    def finish(self):
+        with self._connection:
+            self._connection.execute("DELETE FROM pending WHERE job = ?", (self._job,))
+            self._connection.execute("DELETE FROM visited WHERE job = ?", (self._job,))
+            self._connection.execute("DELETE FROM jobs WHERE job = ?", (self._job,))
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
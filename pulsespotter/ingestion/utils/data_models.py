@@ -42,8 +42,21 @@ class NewsScraperParams(BaseModel):
     scrape_patterns: ScrapePatterns
     blacklisted_urls: Optional[list] = []
     blacklisted_url_patterns: Optional[list] = []
+    max_concurrent_requests: int = 4
+    http_pool_size: int = 10
+    http_connect_timeout: float = 10.0
+    http_read_timeout: float = 120.0
+    http_max_retries: int = 4
+    http_backoff_factor: float = 2.0
+    use_url_filter: bool = True
+    url_filter_capacity: int = 1_000_000
+    url_filter_error_rate: float = 0.001
+    write_buffer_size: int = 100
+    write_buffer_max_delay: float = 5.0
 
 
 class NewsArchiveScraperParams(NewsScraperParams):
     search_url_templates: List[str]
     overwrite_date_if_not_exists: Optional[bool] = False
+    resume_crawls: bool = True
+    crawl_frontier_max_age_days: float = 30
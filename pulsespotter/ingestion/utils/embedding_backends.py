@@ -0,0 +1,81 @@
+from pathlib import Path
+from typing import List, Dict, TYPE_CHECKING
+
+import numpy as np
+
+from pulsespotter.config import RESOURCES_DIR
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+EMBEDDING_BACKENDS = ["torch", "onnx", "onnx-int8"]
+EMBEDDING_MODELS_DIR = RESOURCES_DIR.joinpath("embedding_models")
+
+
+def _export_dir(model_name: str, backend: str) -> Path:
+    return EMBEDDING_MODELS_DIR.joinpath(f"{model_name.replace('/', '--')}--{backend}")
+
+
+# sentence_transformers (and torch) are imported on first use, so that importing this module stays cheap for
+# processes which never load a model, e.g. the preprocessing workers which re-import the ingestion script
+def _load_onnx_model(model_name: str) -> "SentenceTransformer":
+    from sentence_transformers import SentenceTransformer
+    # export the model to ONNX once and load the local copy on the following runs
+    export_dir = _export_dir(model_name, "onnx")
+    if export_dir.joinpath("onnx", "model.onnx").exists():
+        return SentenceTransformer(str(export_dir), device="cpu", backend="onnx")
+    model = SentenceTransformer(model_name, device="cpu", backend="onnx")
+    model.save(str(export_dir))
+    return model
+
+
+def _load_quantized_onnx_model(model_name: str, quantization_config: str) -> "SentenceTransformer":
+    from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+    export_dir = _export_dir(model_name, "onnx")
+    file_name = f"model_qint8_{quantization_config}.onnx"
+    if not export_dir.joinpath("onnx", file_name).exists():
+        model = _load_onnx_model(model_name)
+        export_dynamic_quantized_onnx_model(
+            model, quantization_config=quantization_config, model_name_or_path=str(export_dir),
+        )
+    return SentenceTransformer(
+        str(export_dir), device="cpu", backend="onnx", model_kwargs={"file_name": f"onnx/{file_name}"},
+    )
+
+
+def load_embedding_model(
+        model_name: str, backend: str = "torch", quantization_config: str = "avx2",
+) -> "SentenceTransformer":
+    """
+    Loads the embedding model with the given backend.
+
+    The ONNX backends export the model into `RESOURCES_DIR` on first use. `onnx-int8` additionally applies
+    dynamic int8 quantization, using the ONNX Runtime configuration for the given instruction set
+    (`arm64`, `avx2`, `avx512` or `avx512_vnni`).
+    """
+    from sentence_transformers import SentenceTransformer
+    if backend == "torch":
+        model = SentenceTransformer(model_name, device="cpu")
+    elif backend == "onnx":
+        model = _load_onnx_model(model_name)
+    elif backend == "onnx-int8":
+        model = _load_quantized_onnx_model(model_name, quantization_config)
+    else:
+        raise ValueError(f"Unsupported embedding backend: '{backend}'. Must be one of {EMBEDDING_BACKENDS}.")
+    model.eval()
+    return model
+
+
+def check_backend_agreement(
+        reference_model: "SentenceTransformer", model: "SentenceTransformer", documents: List[str],
+) -> Dict[str, float]:
+    """
+    Calculates the cosine similarity between the embeddings of both models for each of the given documents.
+    """
+    reference_embeddings = reference_model.encode(documents, normalize_embeddings=True, convert_to_numpy=True)
+    embeddings = model.encode(documents, normalize_embeddings=True, convert_to_numpy=True)
+    similarities = np.sum(reference_embeddings * embeddings, axis=1)
+    return {
+        "mean": float(similarities.mean()),
+        "min": float(similarities.min()),
+    }
@@ -0,0 +1,77 @@
+import hashlib
+import sqlite3
+import threading
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+
+class EmbeddingCache:
+    """
+    Persistent mapping from the hash of a document (and the model which embedded it) to its embedding.
+
+    Syndicated articles often produce identical documents, so looking them up here before encoding
+    turns the repeated forward passes into a single SQLite query per batch.
+    """
+
+    def __init__(self, path: Path | str, model_name: str):
+        self._model_name = model_name
+        self._lock = threading.Lock()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(str(path), check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, embedding BLOB NOT NULL)"
+        )
+        self._connection.commit()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else 0.0
+
+    def _key(self, document: str) -> str:
+        return hashlib.sha256(f"{self._model_name}\n{document}".encode("utf-8")).hexdigest()
+
+    def get_many(self, documents: List[str]) -> List[Optional[List[float]]]:
+        keys = [self._key(document) for document in documents]
+        found = {}
+        with self._lock:
+            # stay below the default limit of SQLite host parameters
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                rows = self._connection.execute(
+                    f"SELECT key, embedding FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})", chunk,
+                ).fetchall()
+                found.update(rows)
+            response = []
+            for key in keys:
+                embedding = found.get(key)
+                if embedding is None:
+                    self.misses += 1
+                    response.append(None)
+                else:
+                    self.hits += 1
+                    response.append(np.frombuffer(embedding, dtype=np.float32).tolist())
+        return response
+
+    def put_many(self, documents: List[str], embeddings: List[List[float]]):
+        rows = [
+            (self._key(document), np.asarray(embedding, dtype=np.float32).tobytes())
+            for document, embedding in zip(documents, embeddings)
+        ]
+        with self._lock:
+            self._connection.executemany("INSERT OR REPLACE INTO embeddings (key, embedding) VALUES (?, ?)", rows)
+            self._connection.commit()
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
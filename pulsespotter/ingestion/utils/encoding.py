@@ -0,0 +1,60 @@
+from typing import List
+
+import numpy as np
+
+
+def make_token_budget_batches(lengths: List[int], max_tokens: int, max_batch_size: int) -> List[List[int]]:
+    """
+    Groups document indices into batches of similar token length.
+
+    Indices are sorted by decreasing length, so the first document of a batch is its longest one and a batch
+    is closed once padding every document to that length would exceed `max_tokens`.
+    """
+    if max_tokens <= 0 or max_batch_size <= 0:
+        raise ValueError("Token budget and batch size must be positive integers.")
+    batches = []
+    batch = []
+    batch_max_length = 0
+    for idx in sorted(range(len(lengths)), key=lambda i: lengths[i], reverse=True):
+        if batch and (len(batch) + 1 > max_batch_size or (len(batch) + 1) * batch_max_length > max_tokens):
+            batches.append(batch)
+            batch = []
+        if not batch:
+            batch_max_length = max(lengths[idx], 1)
+        batch.append(idx)
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+class LengthBucketedEncoder:
+    """
+    Wraps a SentenceTransformer model so that documents are encoded in token-budget batches of similar length,
+    instead of padding short teasers to the length of the longest article in the batch.
+    """
+
+    def __init__(self, model, max_tokens: int = 8192, max_batch_size: int = 64):
+        self._model = model
+        self._max_tokens = max_tokens
+        self._max_batch_size = max_batch_size
+
+    def token_lengths(self, documents: List[str]) -> List[int]:
+        encoded = self._model.tokenizer(
+            documents, add_special_tokens=True, truncation=True, max_length=self._model.max_seq_length,
+        )
+        return [len(input_ids) for input_ids in encoded["input_ids"]]
+
+    def encode(self, documents: List[str]) -> np.ndarray:
+        embeddings = None
+        lengths = self.token_lengths(documents)
+        for batch in make_token_budget_batches(lengths, self._max_tokens, self._max_batch_size):
+            batch_embeddings = self._model.encode(
+                [documents[idx] for idx in batch], batch_size=len(batch), convert_to_numpy=True,
+            )
+            if embeddings is None:
+                embeddings = np.empty((len(documents), batch_embeddings.shape[-1]), dtype=batch_embeddings.dtype)
+            # restore the original order of the documents
+            embeddings[batch] = batch_embeddings
+        if embeddings is None:
+            return np.empty((0, self._model.get_sentence_embedding_dimension()), dtype=np.float32)
+        return embeddings
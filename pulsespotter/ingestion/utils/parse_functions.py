@@ -1,38 +1,83 @@
+import datetime
 import re
+from functools import lru_cache
 
 import dateparser
-from more_itertools import first
 
+# Regular expression to find potential date patterns
+DATE_PATTERNS = [
+    r'\d{1,2}[./-]\d{1,2}[./-]\d{2,4}', # Dates with different delimiters: dd-mm-yyyy, mm-dd-yyyy, dd.mm.yyyy, dd/mm/yyyy
+    r'\d{4}[./-]\d{2}[./-]\d{2}',  # ISO-like dates: yyyy-mm-dd, yyyy.mm.dd, yyyy/mm/dd
+    r'\w+[.,\s]+\d{1,2}(?:st|nd|rd|th)?[.,\s]+\d{4}',  # Dates with month names and commas: March 3rd, 2023
+    r'\d{1,2}(?:st|nd|rd|th)?[.,\s]+\w+[.,\s]+\d{4}',  # Dates with month names and commas: 3rd, March 2023
+]
+DATE_PATTERN = re.compile('|'.join(DATE_PATTERNS))
 
+# patterns of the candidates which are parsed without dateparser
+ISO_DATE_PATTERN = re.compile(r'(\d{4})[./-](\d{2})[./-](\d{2})')
+NUMERIC_DATE_PATTERN = re.compile(r'(\d{1,2})[./-](\d{1,2})[./-](\d{4})')
+MONTH_NAME_FIRST_PATTERN = re.compile(r'([^\W\d_]+)[.,\s]+(\d{1,2})(?:st|nd|rd|th)?[.,\s]+(\d{4})')
+DAY_FIRST_PATTERN = re.compile(r'(\d{1,2})(?:st|nd|rd|th)?[.,\s]+([^\W\d_]+)[.,\s]+(\d{4})')
+
+MONTHS = {
+    # german
+    "januar": 1, "jänner": 1, "februar": 2, "märz": 3, "maerz": 3, "mär": 3, "mrz": 3, "mai": 5, "juni": 6,
+    "juli": 7, "oktober": 10, "okt": 10, "dezember": 12, "dez": 12,
+    # english
+    "january": 1, "february": 2, "march": 3, "mar": 3, "may": 5, "june": 6, "july": 7, "october": 10, "oct": 10,
+    "december": 12, "dec": 12,
+    # shared
+    "jan": 1, "feb": 2, "april": 4, "apr": 4, "jun": 6, "jul": 7, "august": 8, "aug": 8, "september": 9,
+    "sep": 9, "sept": 9, "november": 11, "nov": 11,
+}
+
+
+def _to_date(year: str, month: str | int, day: str) -> datetime.date | None:
+    try:
+        return datetime.date(int(year), int(month), int(day))
+    except ValueError:
+        return None
+
+
+def _fast_parse_date(date_str: str) -> datetime.date | None:
+    if match := ISO_DATE_PATTERN.fullmatch(date_str):
+        year, month, day = match.groups()
+        return _to_date(year, month, day)
+    if match := NUMERIC_DATE_PATTERN.fullmatch(date_str):
+        day, month, year = match.groups()
+        return _to_date(year, month, day)
+    if match := DAY_FIRST_PATTERN.fullmatch(date_str):
+        day, month_name, year = match.groups()
+    elif match := MONTH_NAME_FIRST_PATTERN.fullmatch(date_str):
+        month_name, day, year = match.groups()
+    else:
+        return None
+    month = MONTHS.get(month_name.lower())
+    if month is None:
+        return None
+    return _to_date(year, month, day)
+
+
+@lru_cache(maxsize=4096)
+def _parse_date_candidate(date_str: str) -> datetime.date | None:
+    # plain numeric and month name dates are parsed directly, anything else (two digit years, invalid dates,
+    # unknown month names, ...) is left to dateparser
+    if (date := _fast_parse_date(date_str)) is not None:
+        return date
+    # Check for ISO-like formats (yyyy-mm-dd, yyyy.mm.dd, yyyy/mm/dd)
+    if ISO_DATE_PATTERN.match(date_str):
+        date = dateparser.parse(date_str, settings={'PREFER_DAY_OF_MONTH': 'first', 'DATE_ORDER': 'YMD'})
+    else:
+        # Parse other date strings using DMY order
+        date = dateparser.parse(date_str, settings={'PREFER_DAY_OF_MONTH': 'first', 'DATE_ORDER': 'DMY'})
+    return date.date() if date else None
+
+
+@lru_cache(maxsize=4096)
 def parse_date(value: str, output_format: str = "%Y-%m-%d"):
-    # Regular expression to find potential date patterns
-    date_patterns = [
-        r'\d{1,2}[./-]\d{1,2}[./-]\d{2,4}', # Dates with different delimiters: dd-mm-yyyy, mm-dd-yyyy, dd.mm.yyyy, dd/mm/yyyy
-        r'\d{4}[./-]\d{2}[./-]\d{2}',  # ISO-like dates: yyyy-mm-dd, yyyy.mm.dd, yyyy/mm/dd
-        r'\w+[.,\s]+\d{1,2}(?:st|nd|rd|th)?[.,\s]+\d{4}',  # Dates with month names and commas: March 3rd, 2023
-        r'\d{1,2}(?:st|nd|rd|th)?[.,\s]+\w+[.,\s]+\d{4}',  # Dates with month names and commas: 3rd, March 2023
-    ]
-
-    # Combine all patterns into a single regex pattern
-    combined_pattern = re.compile('|'.join(date_patterns))
-    potential_dates = combined_pattern.findall(value)
-
-    extracted_dates = []
-    for date_str in potential_dates:
-        # Check for ISO-like formats (yyyy-mm-dd, yyyy.mm.dd, yyyy/mm/dd)
-        if re.match(r'\d{4}[./-]\d{2}[./-]\d{2}', date_str):
-            date = dateparser.parse(date_str, settings={'PREFER_DAY_OF_MONTH': 'first', 'DATE_ORDER': 'YMD'})
-        else:
-            # Parse other date strings using DMY order
-            date = dateparser.parse(date_str, settings={'PREFER_DAY_OF_MONTH': 'first', 'DATE_ORDER': 'DMY'})
-
-        if date:
-            extracted_dates.append(date)
-
-    result = first(extracted_dates, default=None)
-    if result is None:
-        return
-    return result.strftime(output_format)
+    for date_str in DATE_PATTERN.findall(value):
+        if (date := _parse_date_candidate(date_str)) is not None:
+            return date.strftime(output_format)
 
 
 def string_join(items: list, strip_items: bool = True, strip_result: bool = True):
@@ -1,23 +1,82 @@
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from lxml import etree
 from scrapy import Selector
 
 from pulsespotter.ingestion.utils.data_models import ScrapePattern, ScrapePatterns
 
+# the EXSLT namespaces which scrapy selectors register by default
+XPATH_NAMESPACES = {
+    "re": "http://exslt.org/regular-expressions",
+    "set": "http://exslt.org/sets",
+}
+
+
+@lru_cache(maxsize=1024)
+def compile_xpath(pattern: str) -> etree.XPath:
+    namespaces = {prefix: uri for prefix, uri in XPATH_NAMESPACES.items() if f"{prefix}:" in pattern}
+    try:
+        return etree.XPath(pattern, namespaces=namespaces, smart_strings=False)
+    except etree.XPathSyntaxError as e:
+        raise ValueError(f"Invalid XPath pattern '{pattern}': {e}")
+
+
+def compile_scrape_patterns(extract_patterns: ScrapePatterns) -> Dict[str, etree.XPath]:
+    return {field: compile_xpath(pattern.pattern) for field, pattern in extract_patterns.items() if pattern.pattern}
+
+
+def _serialize_xpath_result(result) -> str:
+    # same serialization as `Selector.get`
+    if isinstance(result, str):
+        return result
+    if isinstance(result, bool):
+        return "1" if result else "0"
+    if isinstance(result, float):
+        return str(result)
+    return etree.tostring(result, method="html", encoding="unicode", with_tail=False)
+
+
+def _evaluate_xpath(selector: Selector, xpath: etree.XPath) -> list:
+    result = xpath(selector.root)
+    return result if isinstance(result, list) else [result]
+
+
+def xpath_getall(selector: Selector, xpath: etree.XPath) -> List[str]:
+    return [_serialize_xpath_result(item) for item in _evaluate_xpath(selector, xpath)]
+
+
+def xpath_get(selector: Selector, xpath: etree.XPath) -> Optional[str]:
+    # only the first match is serialized
+    result = _evaluate_xpath(selector, xpath)
+    return _serialize_xpath_result(result[0]) if result else None
+
+
+def xpath_exists(selector: Selector, xpath: etree.XPath) -> bool:
+    return len(_evaluate_xpath(selector, xpath)) > 0
+
 
-def parse_pattern(selector: Selector, pattern: ScrapePattern):
+def parse_pattern(selector: Selector, pattern: ScrapePattern, xpath: etree.XPath = None):
     if not pattern.pattern:
         return
+    xpath = xpath or compile_xpath(pattern.pattern)
     if pattern.extract_all:
-        response = selector.xpath(pattern.pattern).getall()
+        response = xpath_getall(selector, xpath)
     else:
-        response = selector.xpath(pattern.pattern).get()
+        response = xpath_get(selector, xpath)
     if pattern.parse_func and response is not None:
         response = pattern.parse_func(response)
     return response
 
 
-def parse_website(page_source: str, extract_patterns: ScrapePatterns) -> dict | None:
-    sel = Selector(text=page_source)
+def parse_website(
+        page_source: str | Selector,
+        extract_patterns: ScrapePatterns,
+        compiled_patterns: Dict[str, etree.XPath] = None,
+) -> dict | None:
+    sel = page_source if isinstance(page_source, Selector) else Selector(text=page_source)
+    compiled_patterns = compiled_patterns or {}
     response = {}
     for field, pattern in extract_patterns.items():
-        response[field] = parse_pattern(sel, pattern)
+        response[field] = parse_pattern(sel, pattern, compiled_patterns.get(field))
     return response
@@ -0,0 +1,170 @@
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, List, Optional
+
+_SENTINEL = object()
+
+
+@dataclass
+class StageStats:
+    name: str
+    num_workers: int = 1
+    batches: int = 0
+    items: int = 0
+    busy_seconds: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def update(self, num_items: int, seconds: float):
+        with self._lock:
+            self.batches += 1
+            self.items += num_items
+            self.busy_seconds += seconds
+
+    @property
+    def items_per_second(self) -> float:
+        # busy time is summed over the workers of the stage, so scale it back to wall time per worker
+        effective_seconds = self.busy_seconds / self.num_workers
+        return self.items / effective_seconds if effective_seconds > 0 else 0.0
+
+
+@dataclass
+class _Stage:
+    name: str
+    func: Callable
+    num_workers: int
+    stats: StageStats
+    input_queue: Optional[queue.Queue] = None
+    remaining_workers: int = 0
+
+
+class Pipeline:
+    """
+    Runs batches through a chain of stages, each one served by its own worker threads.
+
+    Stages are connected by bounded queues, so a slow stage blocks its producers instead of letting
+    batches pile up in memory. A stage function receives a batch and returns the batch for the next
+    stage, or None to drop it.
+    """
+
+    def __init__(self, queue_size: int = 4):
+        if queue_size <= 0:
+            raise ValueError("Queue size must be a positive integer.")
+        self._queue_size = queue_size
+        self._stages: List[_Stage] = []
+        self._stop_event = threading.Event()
+        self._errors = []
+
+    def add_stage(self, name: str, func: Callable, num_workers: int = 1) -> "Pipeline":
+        if num_workers <= 0:
+            raise ValueError("Number of workers must be a positive integer.")
+        stats = StageStats(name=name, num_workers=num_workers)
+        self._stages.append(_Stage(name=name, func=func, num_workers=num_workers, stats=stats))
+        return self
+
+    @property
+    def stats(self) -> List[StageStats]:
+        return [stage.stats for stage in self._stages]
+
+    def _put(self, target_queue: queue.Queue, item):
+        while not self._stop_event.is_set():
+            try:
+                target_queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _get(self, source_queue: queue.Queue):
+        while not self._stop_event.is_set():
+            try:
+                return source_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _SENTINEL
+
+    def _finish_worker(self, stage_index: int, lock: threading.Lock):
+        # the last worker of a stage to finish signals every worker of the next stage
+        stage = self._stages[stage_index]
+        with lock:
+            stage.remaining_workers -= 1
+            is_last = stage.remaining_workers == 0
+        if is_last and stage_index + 1 < len(self._stages):
+            next_stage = self._stages[stage_index + 1]
+            for _ in range(next_stage.num_workers):
+                self._put(next_stage.input_queue, _SENTINEL)
+
+    def _run_reader(self, source: Iterable, stats: StageStats):
+        first_stage = self._stages[0]
+        try:
+            iterator = iter(source)
+            while not self._stop_event.is_set():
+                start = time.perf_counter()
+                batch = next(iterator, _SENTINEL)
+                if batch is _SENTINEL:
+                    break
+                stats.update(_num_items(batch), time.perf_counter() - start)
+                self._put(first_stage.input_queue, batch)
+        except Exception as e:
+            self._fail(e)
+        finally:
+            for _ in range(first_stage.num_workers):
+                self._put(first_stage.input_queue, _SENTINEL)
+
+    def _run_worker(self, stage_index: int, lock: threading.Lock):
+        stage = self._stages[stage_index]
+        next_queue = self._stages[stage_index + 1].input_queue if stage_index + 1 < len(self._stages) else None
+        try:
+            while True:
+                batch = self._get(stage.input_queue)
+                if batch is _SENTINEL:
+                    break
+                start = time.perf_counter()
+                result = stage.func(batch)
+                stage.stats.update(_num_items(batch), time.perf_counter() - start)
+                if result is not None and next_queue is not None:
+                    self._put(next_queue, result)
+        except Exception as e:
+            self._fail(e)
+        finally:
+            self._finish_worker(stage_index, lock)
+
+    def _fail(self, error: Exception):
+        self._errors.append(error)
+        self._stop_event.set()
+
+    def run(self, source: Iterable) -> List[StageStats]:
+        if not self._stages:
+            raise ValueError("Pipeline has no stages.")
+        reader_stats = StageStats(name="read")
+        threads = [threading.Thread(target=self._run_reader, args=(source, reader_stats), daemon=True)]
+        for stage_index, stage in enumerate(self._stages):
+            stage.input_queue = queue.Queue(maxsize=self._queue_size)
+            stage.remaining_workers = stage.num_workers
+            lock = threading.Lock()
+            for _ in range(stage.num_workers):
+                threads.append(threading.Thread(target=self._run_worker, args=(stage_index, lock), daemon=True))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if self._errors:
+            raise self._errors[0]
+        return [reader_stats, *self.stats]
+
+
+def _num_items(batch) -> int:
+    try:
+        return len(batch)
+    except TypeError:
+        return 1
+
+
+def format_stage_stats(stats: List[StageStats]) -> List[str]:
+    lines = [f"{'stage':<12}{'workers':>8}{'batches':>10}{'items':>10}{'busy [s]':>12}{'items/s':>12}"]
+    for stage_stats in stats:
+        lines.append(
+            f"{stage_stats.name:<12}{stage_stats.num_workers:>8}{stage_stats.batches:>10}{stage_stats.items:>10}"
+            f"{stage_stats.busy_seconds:>12.2f}{stage_stats.items_per_second:>12.1f}"
+        )
+    return lines
@@ -0,0 +1,80 @@
+import multiprocessing
+import re
+from typing import Dict, List
+
+from nltk.corpus import stopwords
+from nltk.tokenize import word_tokenize
+
+from pulsespotter.ingestion.utils.common import join_strings
+
+PUNCTUATION_PATTERN = re.compile(r"[^\w\s]")
+
+# initialised once per process, either by the pool initializer or lazily on first use
+_stop_words: frozenset | None = None
+
+
+def init_preprocessing(language: str = "german"):
+    global _stop_words
+    _stop_words = frozenset(stopwords.words(language))
+
+
+def preprocess_document(text: str) -> str:
+    if _stop_words is None:
+        init_preprocessing()
+    text = text.lower()
+    text = PUNCTUATION_PATTERN.sub(" ", text)
+    words = word_tokenize(text, language="german")
+    words = [word for word in words if word not in _stop_words]
+    return " ".join(words)
+
+
+def create_document_for_record(record: Dict) -> str:
+    title = join_strings(record.get("title") or []) or None
+    description = join_strings(record.get("description") or []) or None
+    paragraphs = join_strings(record.get("paragraphs") or []) or None
+    document = " ".join([x.strip() for x in [title, description, paragraphs] if x is not None])
+    return preprocess_document(document)
+
+
+class PreprocessingEngine:
+    """
+    Builds the documents to embed from article records, using a pool of processes when `num_workers` > 1.
+
+    Workers are started through a fork server, so they don't inherit the state (e.g. torch threads) of the
+    parent process, and each one loads the stopwords once through the pool initializer.
+    """
+
+    def __init__(self, num_workers: int = 1, chunk_size: int = 8):
+        if num_workers <= 0 or chunk_size <= 0:
+            raise ValueError("Number of workers and chunk size must be positive integers.")
+        self._chunk_size = chunk_size
+        self._pool = None
+        # load the stopwords in this process too, so missing nltk files fail here instead of inside the workers
+        init_preprocessing()
+        if num_workers > 1:
+            context = multiprocessing.get_context("forkserver")
+            # the fork server loads this module once instead of every worker importing it again
+            context.set_forkserver_preload([__name__])
+            self._pool = context.Pool(processes=num_workers, initializer=init_preprocessing)
+
+    def create_documents(self, records: List[Dict]) -> List[str]:
+        # only send the fields needed to build the documents to the workers
+        records = [
+            {"title": r.get("title"), "description": r.get("description"), "paragraphs": r.get("paragraphs")}
+            for r in records
+        ]
+        if self._pool is None:
+            return [create_document_for_record(record) for record in records]
+        return self._pool.map(create_document_for_record, records, chunksize=self._chunk_size)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,35 @@
+import threading
+
+
+class RequestBudgetExhausted(Exception):
+    pass
+
+
+class RequestBudget:
+    """
+    Thread-safe counter of the requests which may still be sent to the scraping API, shared by all scrapers
+    of a process to stay within the ZenRows quota.
+    """
+
+    def __init__(self, max_requests: int):
+        if max_requests < 0:
+            raise ValueError("Request budget must not be negative.")
+        self.max_requests = max_requests
+        self._used = 0
+        self._lock = threading.Lock()
+
+    @property
+    def used(self) -> int:
+        with self._lock:
+            return self._used
+
+    @property
+    def remaining(self) -> int:
+        with self._lock:
+            return self.max_requests - self._used
+
+    def acquire(self):
+        with self._lock:
+            if self._used >= self.max_requests:
+                raise RequestBudgetExhausted(f"The budget of {self.max_requests} requests is exhausted.")
+            self._used += 1
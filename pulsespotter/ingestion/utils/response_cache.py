@@ -0,0 +1,83 @@
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Optional
+
+
+class ResponseCache:
+    """
+    Local cache of the page sources returned by the scraping API.
+
+    Responses are stored gzip compressed under the hash of their content, so that identical pages are stored once,
+    and an SQLite index maps the url and request params of every request to the hash of its response.
+    """
+
+    def __init__(self, root_dir: Path | str):
+        self._root_dir = Path(root_dir)
+        self._blobs_dir = self._root_dir.joinpath("blobs")
+        self._blobs_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            str(self._root_dir.joinpath("index.sqlite")), timeout=30, check_same_thread=False,
+        )
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, url TEXT NOT NULL, params TEXT NOT NULL, content_hash TEXT NOT NULL)"
+        )
+        self._connection.commit()
+
+    @staticmethod
+    def _params_json(params: dict) -> str:
+        # the api key is not part of the key, and unset params are equivalent to missing ones
+        params = {key: value for key, value in params.items() if key not in ("url", "apikey") and value is not None}
+        return json.dumps(params, sort_keys=True)
+
+    @classmethod
+    def key(cls, url: str, params: dict) -> str:
+        return hashlib.sha256(f"{url}\n{cls._params_json(params)}".encode("utf-8")).hexdigest()
+
+    def _blob_path(self, content_hash: str) -> Path:
+        return self._blobs_dir.joinpath(content_hash[:2], f"{content_hash}.html.gz")
+
+    def get(self, url: str, params: dict) -> Optional[str]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT content_hash FROM responses WHERE key = ?", (self.key(url, params),),
+            ).fetchone()
+        if row is None:
+            return None
+        try:
+            return gzip.decompress(self._blob_path(row[0]).read_bytes()).decode("utf-8")
+        except FileNotFoundError:
+            return None
+
+    def put(self, url: str, params: dict, page_source: str):
+        content = page_source.encode("utf-8")
+        content_hash = hashlib.sha256(content).hexdigest()
+        blob_path = self._blob_path(content_hash)
+        if not blob_path.exists():
+            blob_path.parent.mkdir(exist_ok=True)
+            # write to a temporary file first so that readers never see a partial blob
+            tmp_path = blob_path.with_name(f"{blob_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp_path.write_bytes(gzip.compress(content))
+            tmp_path.replace(blob_path)
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses (key, url, params, content_hash) VALUES (?, ?, ?, ?)",
+                (self.key(url, params), url, self._params_json(params), content_hash),
+            )
+            self._connection.commit()
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,109 @@
+import threading
+from typing import Dict, List
+
+
+class ArticleWriteBuffer:
+    """
+    Write-behind buffer of article records.
+
+    Records are inserted in bulk by a background thread once `max_size` records are buffered or the oldest one
+    waited for about `max_delay` seconds, so that the crawl loop does not wait for the database on every article.
+    Urls of records which are buffered or being written are reported by `url in buffer`.
+    """
+
+    def __init__(self, articles_repository, max_size: int = 100, max_delay: float = 5.0):
+        if max_size <= 0 or max_delay <= 0:
+            raise ValueError("Buffer size and delay must be positive.")
+        self._articles_repository = articles_repository
+        self._max_size = max_size
+        self._max_delay = max_delay
+        self._records = []
+        self._pending_urls = set()
+        self._num_writing = 0
+        self._flush_requested = False
+        self._closed = False
+        self._error = None
+        self._condition = threading.Condition()
+        self.num_inserted = 0
+        self.num_duplicates = 0
+        self._thread = threading.Thread(target=self._write_loop, name="article-write-buffer", daemon=True)
+        self._thread.start()
+
+    def __contains__(self, url: str) -> bool:
+        with self._condition:
+            return url in self._pending_urls
+
+    def __len__(self) -> int:
+        with self._condition:
+            return len(self._pending_urls)
+
+    def _raise_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def add(self, record: Dict):
+        with self._condition:
+            self._raise_error()
+            if self._closed:
+                raise RuntimeError("Cannot add records to a closed write buffer.")
+            self._records.append(record)
+            self._pending_urls.add(record["url"])
+            if len(self._records) >= self._max_size:
+                self._condition.notify_all()
+
+    def _should_write(self) -> bool:
+        return self._closed or self._flush_requested or len(self._records) >= self._max_size
+
+    def _write(self, records: List[Dict]):
+        error = None
+        num_inserted = 0
+        try:
+            num_inserted = self._articles_repository.add_articles(records)
+        except Exception as e:
+            error = e
+        with self._condition:
+            self._num_writing -= 1
+            if error is None:
+                self.num_inserted += num_inserted
+                self.num_duplicates += len(records) - num_inserted
+            self._pending_urls.difference_update(record["url"] for record in records)
+            self._error = self._error or error
+            self._condition.notify_all()
+
+    def _write_loop(self):
+        while True:
+            with self._condition:
+                # a timeout without any request means the buffered records reached the maximum delay
+                self._condition.wait_for(self._should_write, timeout=self._max_delay)
+                records, self._records = self._records, []
+                self._flush_requested = False
+                closed = self._closed
+                if records:
+                    self._num_writing += 1
+                else:
+                    self._condition.notify_all()
+            if records:
+                self._write(records)
+            elif closed:
+                return
+
+    def flush(self):
+        """
+        Blocks until all records added so far are written.
+        """
+        with self._condition:
+            self._flush_requested = True
+            self._condition.notify_all()
+            self._condition.wait_for(lambda: not self._records and self._num_writing == 0)
+            self._raise_error()
+
+    def close(self):
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+        with self._condition:
+            self._raise_error()
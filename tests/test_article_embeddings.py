@@ -0,0 +1,33 @@
+import unittest
+import uuid
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.http.models import Distance
+
+from pulsespotter.db.repositories.article_embeddings import ArticleEmbeddingsRepository
+
+
+class TestArticleEmbeddingsRepository(unittest.TestCase):
+    def test_get_embeddings_array(self):
+        repository = ArticleEmbeddingsRepository(QdrantClient(":memory:"))
+        repository.recreate_collection(vector_size=8, distance=Distance.COSINE)
+        article_ids = [f"article-{idx}" for idx in range(25)]
+        embeddings = np.random.default_rng(0).random((25, 8), dtype=np.float32)
+        response = repository.batch_add_embeddings(article_ids, embeddings.tolist())
+        vector_ids = [vector_id for vector_id, _ in response][::-1]
+        # unknown vector ids are dropped and the rest keep the requested order
+        vector_ids.insert(3, str(uuid.uuid4()))
+
+        array, found_vector_ids, found_article_ids = repository.get_embeddings_array(
+            vector_ids, chunk_size=4, max_workers=3,
+        )
+        assert array.dtype == np.float32 and array.shape == (25, 8)
+        assert list(found_vector_ids) == [vector_id for vector_id, _ in response][::-1]
+        assert list(found_article_ids) == article_ids[::-1]
+        expected = embeddings[::-1] / np.linalg.norm(embeddings[::-1], axis=1, keepdims=True)
+        assert np.allclose(array, expected, atol=1e-6)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,34 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from pulsespotter.ingestion.utils.bloom_filter import BloomFilter
+
+
+class TestBloomFilter(unittest.TestCase):
+
+    def test_added_urls_are_found(self):
+        bloom_filter = BloomFilter(capacity=1000, error_rate=0.01)
+        urls = [f"https://example.com/artikel/{i}" for i in range(1000)]
+        bloom_filter.update(urls)
+        assert all(url in bloom_filter for url in urls)
+        false_positives = sum(f"https://example.com/other/{i}" in bloom_filter for i in range(10000))
+        assert false_positives < 300
+
+    def test_save_and_load(self):
+        bloom_filter = BloomFilter(capacity=100)
+        bloom_filter.add("https://example.com/artikel/1")
+        bloom_filter.add("https://example.com/artikel/1")
+        assert bloom_filter.count == 1
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = Path(tmp_dir).joinpath("site.bloom")
+            bloom_filter.save(path, metadata={"last_id": "abc"})
+            loaded_filter, metadata = BloomFilter.load(path)
+        assert metadata == {"last_id": "abc"}
+        assert loaded_filter.count == 1
+        assert "https://example.com/artikel/1" in loaded_filter
+        assert "https://example.com/artikel/2" not in loaded_filter
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+import importlib
+import importlib.util
+import pickle
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+from bson import ObjectId
+from qdrant_client import QdrantClient
+
+TOPIC_MODELLING_INSTALLED = all(importlib.util.find_spec(name) for name in ("bertopic", "hdbscan", "umap", "openai"))
+
+
+def make_week(num_articles: int = 60, num_clusters: int = 3):
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(num_clusters, 16))
+    words = [["hafen", "schiff", "container"], ["schule", "lehrer", "klasse"], ["stadion", "spiel", "tor"]]
+    articles, embeddings = [], []
+    for idx in range(num_articles):
+        cluster = idx % num_clusters
+        articles.append({
+            "_id": str(ObjectId()),
+            "parsed_date": "2024-06-18",
+            "content": " ".join(words[cluster] * 3 + [f"artikel{idx}"]),
+        })
+        embeddings.append(centers[cluster] + 0.01 * rng.normal(size=16))
+    return articles, np.array(embeddings, dtype=np.float32)
+
+
+@unittest.skipUnless(TOPIC_MODELLING_INSTALLED, "topic modelling dependencies are not installed")
+class TestCalculateTopics(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # the script creates its repositories on import, so they are pointed at in-memory / lazy clients
+        with mock.patch("pulsespotter.db.connections.VECTOR_DB_CLIENT", QdrantClient(":memory:")), \
+                mock.patch("pulsespotter.db.connections.MONGO_DATABASE", "test"):
+            cls.module = importlib.import_module("pulsespotter.ingestion.scripts.calculate_topics")
+
+    def fit_week(self, tmp_dir: str):
+        models, build_topic_model_ = [], self.module.build_topic_model
+
+        def build_topic_model():
+            models.append(build_topic_model_())
+            return models[-1]
+
+        with mock.patch.object(self.module, "get_articles_and_embeddings", return_value=make_week()), \
+                mock.patch.object(self.module, "build_topic_model", build_topic_model), \
+                mock.patch.object(self.module, "TOPIC_MODELS_DIR", Path(tmp_dir)):
+            week_topics = self.module.fit_week_topics("2024-06-17", "2024-06-23")
+        return week_topics, models[0]
+
+    def test_fit_week_topics_is_picklable(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            week_topics, _ = self.fit_week(tmp_dir)
+        # results are sent back from the worker processes
+        assert pickle.loads(pickle.dumps(week_topics)) == week_topics
+        assert len(week_topics["article_ids"]) == len(week_topics["topic_assignments"]) == 60
+        assert set(week_topics["topic_embeddings"]) == set(week_topics["topic_labels"])
+
+    def test_store_week_topics(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            week_topics, topic_model = self.fit_week(tmp_dir)
+        topic_assignments_repository = mock.Mock()
+        generated_topic_ids = {topic_index: ObjectId() for topic_index in topic_model.topic_labels_}
+        topic_assignments_repository.batch_add_topic_assignments.return_value = generated_topic_ids
+        with mock.patch.object(
+                self.module, "get_topic_assignments_repository", return_value=topic_assignments_repository,
+        ), mock.patch.object(self.module, "batch_add_embeddings") as batch_add_embeddings:
+            self.module.store_week_topics(week_topics)
+
+        # the same writes as the former inline loop, which used the fitted model directly
+        kwargs = topic_assignments_repository.batch_add_topic_assignments.call_args.kwargs
+        assert kwargs["article_ids"] == [ObjectId(article_id) for article_id in week_topics["article_ids"]]
+        assert kwargs["article_dates"] == 60 * ["2024-06-18"]
+        assert kwargs["topic_labels"] == topic_model.topic_labels_
+        assert list(kwargs["topic_assignments"]) == list(topic_model.topics_)
+        assert (kwargs["topic_start_date"], kwargs["topic_end_date"]) == ("2024-06-17", "2024-06-23")
+        kwargs = batch_add_embeddings.call_args.kwargs
+        assert kwargs["topic_ids"] == [str(generated_topic_ids[idx]) for idx in topic_model.topic_labels_]
+        assert kwargs["embeddings"] == [
+            topic_model.topic_embeddings_[idx].astype(float).tolist() for idx in topic_model.topic_labels_
+        ]
+
+    @unittest.skipUnless(importlib.util.find_spec("mongomock"), "mongomock is not installed")
+    def test_assign_week_topics(self):
+        import mongomock
+        with mock.patch(
+                "pulsespotter.db.repositories.base.get_mongo_database", return_value=mongomock.MongoClient()["test"],
+        ):
+            from pulsespotter.db.repositories.topic_assignments import TopicAssignmentsRepository
+            topic_assignments_repository = TopicAssignmentsRepository()
+        articles, embeddings = make_week(num_articles=66)
+        with tempfile.TemporaryDirectory() as tmp_dir, \
+                mock.patch.object(self.module, "TOPIC_MODELS_DIR", Path(tmp_dir)), \
+                mock.patch.object(
+                    self.module, "get_topic_assignments_repository", return_value=topic_assignments_repository,
+                ), \
+                mock.patch.object(self.module, "batch_add_embeddings"):
+            with mock.patch.object(
+                    self.module, "get_articles_and_embeddings", return_value=(articles[:60], embeddings[:60]),
+            ):
+                self.module.store_week_topics(self.module.fit_week_topics("2024-06-17", "2024-06-23"))
+            # articles which were added to the week later are assigned with the saved model
+            with mock.patch.object(
+                    self.module, "get_articles_and_embeddings", return_value=(articles[60:], embeddings[60:]),
+            ) as get_articles_and_embeddings:
+                assert self.module.assign_week_topics("2024-06-17", "2024-06-23") == 6
+            excluded_ids = get_articles_and_embeddings.call_args.kwargs["exclude_article_ids"]
+            assert excluded_ids == {article["_id"] for article in articles[:60]}
+
+        topic_ids = topic_assignments_repository.get_topic_ids("2024-06-17", "2024-06-23")
+        for article in articles[60:]:
+            assignment = topic_assignments_repository.get_article_assignment(article["_id"])
+            assert assignment["assignment_method"] == "transform"
+            assert ObjectId(assignment["topic_id"]) == topic_ids[assignment["topic_index"]]
+            # the assigned topic is one of the topics fitted on the articles of the same cluster
+            assert article["content"].split()[0] in assignment["topic_label"]
+
+
+if __name__ == "__main__":
+    unittest.main()
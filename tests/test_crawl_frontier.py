@@ -0,0 +1,46 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from pulsespotter.ingestion.utils.crawl_frontier import CrawlFrontier
+
+
+class TestCrawlFrontier(unittest.TestCase):
+    def test_resume(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = Path(tmp_dir).joinpath("site.sqlite")
+            with CrawlFrontier(path, job="2024-06-18:2024-06-19:5") as frontier:
+                assert not frontier.start([("2024-06-19", "/archiv/19"), ("2024-06-18", "/archiv/18")])
+                assert frontier.next_pending() == ("2024-06-19", "/archiv/19", "/archiv/19")
+                frontier.complete("/archiv/19", "2024-06-19", next_url="/archiv/19?page=2")
+            # the next page of a start url is crawled before the remaining start urls
+            with CrawlFrontier(path, job="2024-06-18:2024-06-19:5") as frontier:
+                assert frontier.start([("2024-06-19", "/archiv/19"), ("2024-06-18", "/archiv/18")])
+                assert frontier.next_pending() == ("2024-06-19", "/archiv/19?page=2", "/archiv/19")
+                frontier.complete("/archiv/19?page=2", "2024-06-19", next_url="/archiv/19")
+                assert frontier.next_pending() == ("2024-06-18", "/archiv/18", "/archiv/18")
+                assert (frontier.num_pending, frontier.num_visited) == (1, 2)
+                frontier.finish()
+                assert frontier.next_pending() is None
+            # other jobs of the site start from scratch
+            with CrawlFrontier(path, job="2024-06-19:2024-06-19:5") as frontier:
+                assert not frontier.start([("2024-06-19", "/archiv/19")])
+
+    def test_prune_abandoned_jobs(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = Path(tmp_dir).joinpath("site.sqlite")
+            with CrawlFrontier(path, job="2024-06-18:2024-06-18:5") as frontier:
+                frontier.start([("2024-06-18", "/archiv/18")])
+            with CrawlFrontier(path, job="2024-06-19:2024-06-19:5") as frontier:
+                frontier.start([("2024-06-19", "/archiv/19")])
+                frontier.complete("/archiv/19", "2024-06-19", next_url="/archiv/19?page=2")
+            # opening the frontier removes the state of jobs which were not updated recently
+            with CrawlFrontier(path, job="2024-06-18:2024-06-18:5", max_age_days=0) as frontier:
+                assert (frontier.num_pending, frontier.num_visited) == (0, 0)
+                assert not frontier.start([("2024-06-18", "/archiv/18")])
+            with CrawlFrontier(path, job="2024-06-19:2024-06-19:5") as frontier:
+                assert (frontier.num_pending, frontier.num_visited) == (0, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,25 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from pulsespotter.ingestion.utils.embedding_cache import EmbeddingCache
+
+
+class TestEmbeddingCache(unittest.TestCase):
+    def test_get_and_put(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = Path(tmp_dir).joinpath("cache.sqlite")
+            with EmbeddingCache(path, model_name="model-a") as cache:
+                assert cache.get_many(["first", "second"]) == [None, None]
+                cache.put_many(["first"], [[0.5, 0.25]])
+                assert cache.get_many(["first", "second"]) == [[0.5, 0.25], None]
+                assert (cache.hits, cache.misses) == (1, 3)
+            # the cache is persistent and keyed by model name
+            with EmbeddingCache(path, model_name="model-a") as cache:
+                assert cache.get_many(["first"]) == [[0.5, 0.25]]
+            with EmbeddingCache(path, model_name="model-b") as cache:
+                assert cache.get_many(["first"]) == [None]
+
+
+if __name__ == "__main__":
+    unittest.main()
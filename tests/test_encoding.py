@@ -0,0 +1,35 @@
+import unittest
+
+import numpy as np
+
+from pulsespotter.ingestion.utils.encoding import make_token_budget_batches, LengthBucketedEncoder
+
+
+class FakeModel:
+    max_seq_length = 128
+
+    def tokenizer(self, documents, **kwargs):
+        return {"input_ids": [document.split() for document in documents]}
+
+    def encode(self, documents, **kwargs):
+        return np.array([[len(document.split()), 0.0] for document in documents], dtype=np.float32)
+
+    def get_sentence_embedding_dimension(self):
+        return 2
+
+
+class TestEncoding(unittest.TestCase):
+    def test_make_token_budget_batches(self):
+        batches = make_token_budget_batches([2, 10, 3, 9, 1], max_tokens=20, max_batch_size=3)
+        assert batches == [[1, 3], [2, 0, 4]]
+        assert make_token_budget_batches([100], max_tokens=20, max_batch_size=3) == [[0]]
+
+    def test_encode_restores_order(self):
+        documents = ["a " * n for n in [5, 1, 40, 3, 17, 2]]
+        encoder = LengthBucketedEncoder(FakeModel(), max_tokens=40, max_batch_size=2)
+        embeddings = encoder.encode(documents)
+        assert embeddings[:, 0].tolist() == [5, 1, 40, 3, 17, 2]
+
+
+if __name__ == "__main__":
+    unittest.main()
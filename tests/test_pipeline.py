@@ -0,0 +1,32 @@
+import unittest
+
+from more_itertools import chunked
+
+from pulsespotter.ingestion.utils.pipeline import Pipeline
+
+
+class TestPipeline(unittest.TestCase):
+    def test_run(self):
+        results = []
+        pipeline = Pipeline(queue_size=2)
+        pipeline.add_stage("drop_odd", lambda batch: [x for x in batch if x % 2 == 0] or None)
+        pipeline.add_stage("square", lambda batch: [x * x for x in batch], num_workers=3)
+        pipeline.add_stage("collect", results.extend)
+        stats = pipeline.run(chunked(range(100), 7))
+        assert sorted(results) == [x * x for x in range(0, 100, 2)]
+        assert [s.name for s in stats] == ["read", "drop_odd", "square", "collect"]
+        assert stats[0].items == 100 and stats[1].items == 100 and stats[2].items == 50
+
+    def test_run_propagates_errors(self):
+        def fail(batch):
+            raise RuntimeError("stage failed")
+
+        pipeline = Pipeline(queue_size=1)
+        pipeline.add_stage("identity", lambda batch: batch, num_workers=2)
+        pipeline.add_stage("fail", fail)
+        with self.assertRaises(RuntimeError):
+            pipeline.run(chunked(range(1000), 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
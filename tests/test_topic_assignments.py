@@ -0,0 +1,60 @@
+import importlib.util
+import unittest
+from unittest import mock
+
+import numpy as np
+from bson import ObjectId
+
+MONGOMOCK_INSTALLED = importlib.util.find_spec("mongomock") is not None
+
+
+@unittest.skipUnless(MONGOMOCK_INSTALLED, "mongomock is not installed")
+class TestTopicAssignmentsRepository(unittest.TestCase):
+
+    def setUp(self):
+        import mongomock
+        with mock.patch(
+                "pulsespotter.db.repositories.base.get_mongo_database", return_value=mongomock.MongoClient()["test"],
+        ):
+            from pulsespotter.db.repositories.topic_assignments import TopicAssignmentsRepository
+            self.repository = TopicAssignmentsRepository()
+
+    def add_week(self, article_ids, topic_assignments, **kwargs):
+        return self.repository.batch_add_topic_assignments(
+            article_ids=article_ids,
+            article_dates=["2024-06-18"] * len(article_ids),
+            topic_labels={-1: "-1_noise", 0: "0_hafen", 1: "1_schule"},
+            topic_assignments=topic_assignments,
+            assignment_probabilities=kwargs.pop("assignment_probabilities", [0.9] * len(article_ids)),
+            topic_start_date="2024-06-17",
+            topic_end_date="2024-06-23",
+            **kwargs,
+        )
+
+    def test_incremental_assignments(self):
+        article_ids = [ObjectId() for _ in range(3)]
+        topic_ids = self.add_week(article_ids, [0, 1, 0])
+        assert self.repository.get_topic_ids("2024-06-17", "2024-06-23") == {0: topic_ids[0], 1: topic_ids[1]}
+        assert self.repository.get_assigned_document_ids("2024-06-17", "2024-06-23") == set(map(str, article_ids))
+        assert self.repository.get_topic_ids("2024-06-24", "2024-06-30") == {}
+
+        # new articles are assigned to the existing topics, with numpy topic indices as returned by `transform`
+        new_article_ids = [ObjectId(), ObjectId()]
+        new_topic_ids = self.add_week(
+            new_article_ids, np.array([1, -1]),
+            assignment_probabilities=[None, None],
+            topic_ids=self.repository.get_topic_ids("2024-06-17", "2024-06-23"),
+            assignment_similarities=list(np.array([0.8, 0.3], dtype=np.float32)),
+        )
+        assert new_topic_ids[0] == topic_ids[0] and new_topic_ids[1] == topic_ids[1]
+        assert new_topic_ids[-1] != topic_ids[-1]
+        assignment = self.repository.get_article_assignment(str(new_article_ids[0]))
+        assert assignment["topic_id"] == str(topic_ids[1]) and assignment["topic_index"] == 1
+        assert assignment["assignment_method"] == "transform" and assignment["assignment_probability"] is None
+        assert abs(assignment["assignment_similarity"] - 0.8) < 1e-6
+        assignment = self.repository.get_article_assignment(str(article_ids[0]))
+        assert assignment["assignment_method"] == "fit" and "assignment_similarity" not in assignment
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import threading
+import unittest
+
+from pulsespotter.ingestion.utils.write_buffer import ArticleWriteBuffer
+
+
+class FakeArticlesRepository:
+    def __init__(self):
+        self.urls = set()
+        self.num_writes = 0
+        self.release = threading.Event()
+        self.release.set()
+
+    def add_articles(self, articles: list):
+        self.release.wait()
+        self.num_writes += 1
+        new_urls = {article["url"] for article in articles} - self.urls
+        self.urls |= new_urls
+        return len(new_urls)
+
+
+class TestArticleWriteBuffer(unittest.TestCase):
+
+    def test_pending_urls_and_flush(self):
+        repository = FakeArticlesRepository()
+        repository.release.clear()
+        buffer = ArticleWriteBuffer(repository, max_size=2, max_delay=60)
+        buffer.add({"url": "a"})
+        buffer.add({"url": "b"})
+        buffer.add({"url": "c"})
+        # urls count as pending until their write has finished
+        assert "a" in buffer and "c" in buffer
+        repository.release.set()
+        buffer.flush()
+        assert len(buffer) == 0
+        assert repository.urls == {"a", "b", "c"}
+        buffer.add({"url": "a"})
+        buffer.close()
+        assert (buffer.num_inserted, buffer.num_duplicates) == (3, 1)
+
+    def test_max_delay(self):
+        repository = FakeArticlesRepository()
+        buffer = ArticleWriteBuffer(repository, max_size=100, max_delay=0.05)
+        buffer.add({"url": "a"})
+        threading.Event().wait(0.5)
+        assert repository.urls == {"a"}
+        buffer.close()
+
+    def test_write_errors_are_raised(self):
+        repository = FakeArticlesRepository()
+        repository.add_articles = lambda articles: 1 / 0
+        buffer = ArticleWriteBuffer(repository, max_size=1, max_delay=60)
+        buffer.add({"url": "a"})
+        with self.assertRaises(ZeroDivisionError):
+            buffer.flush()
+        buffer.close()
+
+
+if __name__ == "__main__":
+    unittest.main()